@@ -11,8 +11,11 @@ import sys
 from pathlib import Path
 import json
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Dict, List
 import traceback
+import gc
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 
 # Add trackers directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'trackers'))
@@ -25,31 +28,75 @@ except ImportError:
     GPU_AVAILABLE = False
     print("Warning: GPUtil not available. GPU metrics will not be collected.")
 
-# Import tracker wrappers
-from csrt_wrapper import CSRTWrapper
-from ostrack_wrapper import OSTrackWrapper
-from siamrpn_wrapper import SiamRPNWrapper
-from dimp_wrapper import DIMPWrapper
+# Tracker wrappers are imported on demand, so only the selected trackers' dependencies load
+from registry import PRECISIONS, parse_names, tracker_factory, variant_names
+from frame_cache import FrameCache
+from hardware_sampler import HardwareSampler
+from frame_reader import PrefetchReader
+from shared_frames import SharedFrameReader
+from frame_store import FrameWriter, StreamingFrameWriter, export_frame_csv, safe_name
+from results_history import ResultsHistory
+
+DEFAULT_TRACKERS = ['CSRT', 'OSTrack', 'SiamRPN++', 'DiMP']
+# Tracker attributes counting work done during a run (DiMP filter updates, CSRT-async refreshes)
+RUN_COUNTERS = ('model_updates', 'refreshes')
+
+# Frames per chunk file in the per-frame store
+FRAME_CHUNK = 4096
 
 class HardwareBenchmark:
     """Benchmark trackers with hardware metrics"""
     
-    def __init__(self, video_path: str, output_dir: str = "../results"):
+    def __init__(self, video_path: str, output_dir: str = "../results",
+                 cache_dir: str = None, tracker_names: List[str] = None,
+                 sample_rate_hz: float = 200.0, frame_source: str = 'cache',
+                 reader_options: Dict = None, tracker_options: Dict = None,
+                 frame_store: str = None, run_id: str = None, frame_csv: bool = True,
+                 stage_timing: bool = True):
         self.video_path = video_path
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
-        # Initialize trackers
-        self.trackers = {
-            'CSRT': CSRTWrapper(),
-            'OSTrack': OSTrackWrapper(),
-            'SiamRPN++': SiamRPNWrapper(),
-            'DiMP': DIMPWrapper()
-        }
+        # Per-frame records are streamed into a columnar store partitioned by
+        # tracker/video/run; the MATLAB CSVs are exported from it
+        self.frame_store = Path(frame_store) if frame_store else self.output_dir / 'frames'
+        self.run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+        self.frame_csv = frame_csv
+        
+        # Per-stage times inside update() for wrappers with a StageTimer
+        self.stage_timing = stage_timing
+        
+        # Decoded once, replayed for every tracker
+        self.cache_dir = cache_dir
+        self.frame_cache = FrameCache(video_path, cache_dir)
+        self.frame_caches = {video_path: self.frame_cache}
+        self.sample_rate_hz = sample_rate_hz
+        
+        # 'cache': replay pre-decoded frames (tracker cost only)
+        # 'live': decode on a prefetch thread while tracking (end-to-end pipeline)
+        # 'shm': decode in a separate process into a shared-memory ring (zero-copy)
+        self.frame_source = frame_source
+        self.reader_options = reader_options or {}
         
         # Process info
         self.process = psutil.Process(os.getpid())
         
+        # Initialize trackers; tracker_options maps tracker name -> constructor kwargs,
+        # precision variants fall back to their base tracker's options
+        self.tracker_options = tracker_options or {}
+        self.trackers = {}
+        self.model_ram_mb = {}
+        for name in (tracker_names or DEFAULT_TRACKERS):
+            options = self.tracker_options.get(name, self.tracker_options.get(name.rpartition('-')[0], {}))
+            # Import the wrapper first: RSS growth while building the tracker then
+            # approximates its model footprint, not its libraries
+            factory = tracker_factory(name)
+            gc.collect()
+            rss_before = self.process.memory_info().rss
+            self.trackers[name] = factory(**options)
+            gc.collect()
+            self.model_ram_mb[name] = (self.process.memory_info().rss - rss_before) / 1024 / 1024
+        
     def measure_hardware(self) -> Dict:
         """Measure current hardware usage"""
         metrics = {
@@ -92,12 +139,25 @@ class HardwareBenchmark:
             
         return metrics
     
-    def benchmark_tracker(self, tracker_name: str, num_frames: int = 300) -> Dict:
+    def load_frames(self, num_frames: int):
+        """Decode the video once and return the shared read-only frame store"""
+        return self.frame_cache.load(num_frames)
+    
+    def set_video(self, video_path: str):
+        """Benchmark another video with the same trackers; each video keeps its frame cache"""
+        self.video_path = video_path
+        if video_path not in self.frame_caches:
+            self.frame_caches[video_path] = FrameCache(video_path, self.cache_dir)
+        self.frame_cache = self.frame_caches[video_path]
+    
+    def benchmark_tracker(self, tracker_name: str, num_frames: int = 300,
+                          warmup_frames: int = 0) -> Dict:
         """
         Benchmark a single tracker
         Args:
             tracker_name: Name of tracker to benchmark
             num_frames: Number of frames to process
+            warmup_frames: Frames tracked after init but left out of all statistics
         Returns:
             Dictionary with benchmark results
         """
@@ -106,17 +166,26 @@ class HardwareBenchmark:
         print(f"{'='*60}")
         
         tracker = self.trackers[tracker_name]
-        cap = cv2.VideoCapture(self.video_path)
-        
-        if not cap.isOpened():
-            print(f"Error: Cannot open video {self.video_path}")
-            return None
-        
-        # Read first frame
-        ret, frame = cap.read()
-        if not ret:
-            print("Error: Cannot read first frame")
-            return None
+        frames = None
+        reader = None
+        if self.frame_source in ('live', 'shm'):
+            reader_cls = SharedFrameReader if self.frame_source == 'shm' else PrefetchReader
+            reader = reader_cls(self.video_path, max_frames=num_frames + warmup_frames + 1,
+                                **self.reader_options)
+            if not reader.isOpened():
+                print(f"Error: Cannot open video {self.video_path}")
+                return None
+            ret, frame, _ = reader.start().read_timed()
+            if not ret:
+                print("Error: Cannot read first frame")
+                reader.release()
+                return None
+        else:
+            frames = self.load_frames(num_frames + warmup_frames + 1)
+            if frames is None:
+                return None
+            # Copy out of the memmap so page faults are not timed as tracker work
+            frame = np.array(frames[0])
         
         # Manual bounding box selection or use default
         # For automation, we'll use center box
@@ -124,111 +193,179 @@ class HardwareBenchmark:
         bbox = (w//4, h//4, w//2, h//2)  # Center box
         
         print(f"Initializing tracker with bbox: {bbox}")
+        timer = getattr(tracker, 'timer', None) if self.stage_timing else None
+        if timer is not None:
+            timer.enabled = True
+            timer.start_frame()
+        init_start = time.perf_counter()
         tracker.init(frame, bbox)
+        init_ms = (time.perf_counter() - init_start) * 1000
+        # Stages that ran during init (template extraction, calibration, ...)
+        init_stage_ms = {}
+        if timer is not None:
+            init_stage_ms = {stage: ns / 1e6 for stage, ns in zip(timer.stages, timer.frame_ns()) if ns}
         
-        # Metrics storage
-        frame_times = []
-        cpu_usage = []
-        ram_usage = []
-        gpu_usage = []
-        gpu_memory = []
-        latencies = []
+        # Warm-up: first updates pay for lazy allocation, caches and backend setup
+        frame_buf = np.empty_like(frame)
+        for i in range(warmup_frames):
+            if reader:
+                ret, frame, _ = reader.read_timed()
+                if not ret:
+                    break
+            else:
+                np.copyto(frame_buf, frames[i + 1])
+                frame = frame_buf
+            tracker.update(frame)
+        first = 1 + warmup_frames
         
         # Baseline hardware
         baseline = self.measure_hardware()
         print(f"Baseline - CPU: {baseline['cpu_percent']:.1f}%, RAM: {baseline['ram_mb']:.1f}MB")
         
         frame_count = 0
-        max_frames = min(num_frames, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        max_frames = num_frames if reader else max(0, min(num_frames, len(frames) - first))
+        captured = np.nan
         
         print(f"Processing {max_frames} frames...")
         
+        # Hardware is sampled on a background thread; the loop only records timestamps.
+        # Frames are buffered in fixed-size chunks, attributed and flushed to the frame
+        # store as the run goes, so memory stays flat however long it runs
+        sampler = HardwareSampler(rate_hz=self.sample_rate_hz)
+        writer = FrameWriter(self.frame_store, safe_name(tracker_name),
+                             safe_name(Path(self.video_path).stem), self.run_id)
+        stage_ns = timer.frame_ns() if timer is not None else None
+        recorder = StreamingFrameWriter(writer, sampler.attribute, baseline['ram_mb'],
+                                        chunk_size=FRAME_CHUNK,
+                                        stages=timer.stages if timer is not None else ())
+        sampler.start()
+        loop_start = time.perf_counter()
+        
         while frame_count < max_frames:
-            ret, frame = cap.read()
-            if not ret:
-                break
+            if reader:
+                ret, frame, captured = reader.read_timed()
+                if not ret:
+                    break
+            else:
+                np.copyto(frame_buf, frames[frame_count + first])
+                frame = frame_buf
             
-            # Measure tracking time and hardware
+            if timer is not None:
+                timer.start_frame()
+            
+            # Measure tracking time
             start_time = time.perf_counter()
-            hw_before = self.measure_hardware()
             
             success, bbox = tracker.update(frame)
             
             end_time = time.perf_counter()
-            hw_after = self.measure_hardware()
-            
-            # Calculate metrics
-            latency = (end_time - start_time) * 1000  # ms
-            latencies.append(latency)
-            frame_times.append(end_time - start_time)
-            
-            # Hardware metrics (delta from baseline)
-            cpu_usage.append(hw_after['cpu_percent'])
-            ram_usage.append(hw_after['ram_mb'] - baseline['ram_mb'])
-            gpu_usage.append(hw_after['gpu_util'])
-            gpu_memory.append(hw_after['gpu_memory_mb'])
             
+            recorder.record(start_time, end_time, success, bbox, captured, stage_ns)
             frame_count += 1
             
             if frame_count % 50 == 0:
-                avg_fps = frame_count / sum(frame_times)
+                latency = (end_time - start_time) * 1000  # ms
+                avg_fps = frame_count / recorder.busy_seconds
                 print(f"Frame {frame_count}/{max_frames} - FPS: {avg_fps:.1f}, "
-                      f"Latency: {latency:.1f}ms, CPU: {hw_after['cpu_percent']:.1f}%")
+                      f"Latency: {latency:.1f}ms")
         
-        cap.release()
+        loop_time = time.perf_counter() - loop_start
+        sampler.stop()
+        if frame_count < max_frames // 2:
+            print(f"Warning: only {frame_count}/{max_frames} frames were tracked; "
+                  f"statistics cover too few frames to compare")
+        if timer is not None:
+            timer.enabled = False
+        if reader:
+            reader.release()
+        if hasattr(tracker, 'close'):
+            # Stop background model-update threads before reading tracker state
+            tracker.close()
         
-        # Calculate summary statistics
+        # Attribute sampled hardware metrics to the remaining frames and close the partition
+        recorder.close(frame_source=self.frame_source, video_path=str(self.video_path))
+        stats = recorder.summary()
+        latency = stats['latency_ms']
+        cpu, ram, gpu, gpu_memory = (stats[k] for k in ('cpu_percent', 'ram_mb', 'gpu_util', 'gpu_memory_mb'))
+        
+        # Summary statistics from streaming moments; percentiles from the quantile sketch
         results = {
             'tracker': tracker_name,
             'frames_processed': frame_count,
-            'avg_fps': frame_count / sum(frame_times) if frame_times else 0,
-            'min_fps': 1.0 / max(frame_times) if frame_times else 0,
-            'max_fps': 1.0 / min(frame_times) if frame_times else 0,
-            'avg_latency_ms': np.mean(latencies),
-            'std_latency_ms': np.std(latencies),
-            'max_latency_ms': np.max(latencies),
-            'min_latency_ms': np.min(latencies),
-            'p95_latency_ms': np.percentile(latencies, 95),
-            'p99_latency_ms': np.percentile(latencies, 99),
-            'avg_cpu_percent': np.mean(cpu_usage),
-            'max_cpu_percent': np.max(cpu_usage),
-            'avg_ram_mb': np.mean(ram_usage),
-            'max_ram_mb': np.max(ram_usage),
-            'avg_gpu_util': np.mean(gpu_usage),
-            'max_gpu_util': np.max(gpu_usage),
-            'avg_gpu_memory_mb': np.mean(gpu_memory),
-            'max_gpu_memory_mb': np.max(gpu_memory),
+            'warmup_frames': warmup_frames,
+            'init_ms': init_ms,
+            'init_stage_ms': init_stage_ms,
+            'avg_fps': frame_count / recorder.busy_seconds if recorder.busy_seconds > 0 else 0,
+            'min_fps': 1000.0 / latency['max'] if latency['max'] > 0 else 0,
+            'max_fps': 1000.0 / latency['min'] if latency['min'] > 0 else 0,
+            'avg_latency_ms': latency['mean'],
+            'std_latency_ms': latency['std'],
+            'max_latency_ms': latency['max'],
+            'min_latency_ms': latency['min'],
+            'p95_latency_ms': latency['p95'],
+            'p99_latency_ms': latency['p99'],
+            'avg_cpu_percent': cpu['mean'],
+            'max_cpu_percent': cpu['max'],
+            'avg_ram_mb': ram['mean'],
+            'max_ram_mb': ram['max'],
+            'avg_gpu_util': gpu['mean'],
+            'max_gpu_util': gpu['max'],
+            'avg_gpu_memory_mb': gpu_memory['mean'],
+            'max_gpu_memory_mb': gpu_memory['max'],
             'baseline_ram_mb': baseline['ram_mb'],
-            'latency_variance': np.var(latencies)
+            'model_ram_mb': self.model_ram_mb.get(tracker_name, 0.0),
+            'latency_variance': latency['variance'],
+            'frame_source': self.frame_source,
+            'tracker_params': tracker.get_params() if hasattr(tracker, 'get_params') else {},
+            # Run-time counters stay out of tracker_params, which is hashed as configuration
+            **{name: getattr(tracker, name) for name in RUN_COUNTERS if hasattr(tracker, name)},
+            'frame_partition': str(writer.path),
+            'stage_latency_ms': {
+                stage: {k: s[k] for k in ('mean', 'p50', 'p95', 'p99', 'max')}
+                for stage, s in recorder.stage_summary().items()
+            },
+            # Wall-clock throughput including waiting for frames
+            'pipeline_fps': frame_count / loop_time if loop_time > 0 else 0
         }
         
-        # Detailed frame-by-frame data
-        results['frame_data'] = {
-            'latencies': latencies,
-            'cpu_usage': cpu_usage,
-            'ram_usage': ram_usage,
-            'gpu_usage': gpu_usage,
-            'gpu_memory': gpu_memory
-        }
+        if reader:
+            # Capture-to-result latency, including time spent queued
+            e2e = stats['e2e_latency_ms']
+            results.update({
+                'avg_e2e_latency_ms': e2e['mean'],
+                'p95_e2e_latency_ms': e2e['p95'],
+                'p99_e2e_latency_ms': e2e['p99'],
+                'decoded_frames': reader.decoded,
+                'dropped_frames': reader.dropped
+            })
         
         print(f"\n{tracker_name} Results:")
         print(f"  Avg FPS: {results['avg_fps']:.2f}")
         print(f"  Avg Latency: {results['avg_latency_ms']:.2f}ms (±{results['std_latency_ms']:.2f})")
         print(f"  P95 Latency: {results['p95_latency_ms']:.2f}ms")
+        print(f"  Pipeline FPS: {results['pipeline_fps']:.2f}")
+        if reader:
+            print(f"  Avg E2E Latency: {results['avg_e2e_latency_ms']:.2f}ms, "
+                  f"Dropped: {results['dropped_frames']}/{results['decoded_frames']}")
+        for stage, s in results['stage_latency_ms'].items():
+            print(f"    {stage}: {s['mean']:.2f}ms (p99 {s['p99']:.2f}ms)")
+        print(f"  Init: {init_ms:.2f}ms")
+        for stage, ms in init_stage_ms.items():
+            print(f"    {stage}: {ms:.2f}ms")
         print(f"  Avg CPU: {results['avg_cpu_percent']:.1f}%")
-        print(f"  Avg RAM: {results['avg_ram_mb']:.1f}MB")
+        print(f"  Avg RAM: {results['avg_ram_mb']:.1f}MB (model: {results['model_ram_mb']:.1f}MB)")
         print(f"  Avg GPU: {results['avg_gpu_util']:.1f}%")
         print(f"  Avg GPU Memory: {results['avg_gpu_memory_mb']:.1f}MB")
         
         return results
     
-    def run_all_benchmarks(self, num_frames: int = 300):
+    def run_all_benchmarks(self, num_frames: int = 300, warmup_frames: int = 0):
         """Run benchmarks for all trackers"""
         all_results = {}
         
         for tracker_name in self.trackers.keys():
             try:
-                result = self.benchmark_tracker(tracker_name, num_frames)
+                result = self.benchmark_tracker(tracker_name, num_frames, warmup_frames)
                 if result:
                     all_results[tracker_name] = result
                     
@@ -244,6 +381,98 @@ class HardwareBenchmark:
         self.save_results(all_results)
         return all_results
     
+    def worker_config(self) -> Dict:
+        """Constructor arguments for rebuilding this benchmark in a worker process"""
+        return {
+            'video_path': self.video_path,
+            'output_dir': str(self.output_dir),
+            'cache_dir': self.cache_dir,
+            'sample_rate_hz': self.sample_rate_hz,
+            'frame_source': self.frame_source,
+            'reader_options': self.reader_options,
+            'tracker_options': self.tracker_options,
+            'frame_store': str(self.frame_store),
+            'run_id': self.run_id,
+            'frame_csv': self.frame_csv,
+            'stage_timing': self.stage_timing
+        }
+    
+    def run_parallel_benchmarks(self, num_frames: int = 300, workers: int = 2,
+                                warmup_frames: int = 0):
+        """
+        Run each tracker in its own process pinned to a dedicated core set
+        With the 'shm' frame source, one decoder process per batch of concurrent
+        trackers feeds them all through a shared-memory ring
+        Args:
+            num_frames: Number of frames to process
+            workers: Number of concurrent worker processes
+            warmup_frames: Untimed frames after init
+        """
+        # Populate the frame cache once so workers only replay the memmap
+        if self.frame_source == 'cache' and self.load_frames(num_frames + warmup_frames + 1) is None:
+            return {}
+        
+        core_sets = split_core_sets(workers)
+        print(f"\nRunning {len(self.trackers)} trackers on {len(core_sets)} workers: "
+              f"{', '.join(str(c) for c in core_sets)}")
+        
+        ctx = mp.get_context('spawn')
+        core_queue = ctx.Queue()
+        for cores in core_sets:
+            core_queue.put(cores)
+        
+        names = list(self.trackers)
+        pool_args = dict(mp_context=ctx, initializer=_init_worker, initargs=(core_queue,))
+        shared_decoder = self.frame_source == 'shm'
+        if sys.version_info >= (3, 11) and not shared_decoder:
+            # A fresh process per tracker: thread pools, allocator state and backends
+            # imported by one tracker never carry over into the next one's timings
+            waves = [names]
+        else:
+            # One shared decoder can only feed trackers that run at the same time; without
+            # max_tasks_per_child, one single-process pool per tracker. `workers` at a time
+            waves = [names[i:i + len(core_sets)] for i in range(0, len(names), len(core_sets))]
+        
+        all_results = {}
+        for wave in waves:
+            if sys.version_info >= (3, 11):
+                pools = [ProcessPoolExecutor(len(core_sets), max_tasks_per_child=1, **pool_args)] * len(wave)
+            else:
+                pools = [ProcessPoolExecutor(1, **pool_args) for _ in wave]
+            configs = [self.worker_config() for _ in wave]
+            decoder = None
+            if shared_decoder:
+                # One decoder process feeds every tracker of the wave through one ring
+                decoder = SharedFrameReader(self.video_path, max_frames=num_frames + warmup_frames + 1,
+                                            readers=len(wave), **self.reader_options)
+                if not decoder.isOpened():
+                    print(f"Error: Cannot open video {self.video_path}")
+                    break
+                decoder.start()
+                for i, config in enumerate(configs):
+                    config['reader_options'] = dict(self.reader_options, attach=decoder.spec, reader=i)
+            futures = {}
+            for i, (name, pool, config) in enumerate(zip(wave, pools, configs)):
+                futures[name] = pool.submit(_benchmark_worker, config, name, num_frames, warmup_frames)
+                if decoder is not None:
+                    # A tracker that finished or failed must not hold back the others
+                    futures[name].add_done_callback(lambda _, i=i: decoder.detach(i))
+            for tracker_name, future in futures.items():
+                try:
+                    result = future.result()
+                    if result:
+                        all_results[tracker_name] = result
+                except Exception as e:
+                    print(f"Error benchmarking {tracker_name}: {e}")
+                    traceback.print_exc()
+            for pool in set(pools):
+                pool.shutdown()
+            if decoder is not None:
+                decoder.release()
+        
+        self.save_results(all_results)
+        return all_results
+    
     def save_results(self, results: Dict):
         """Save benchmark results to files"""
         
@@ -266,7 +495,10 @@ class HardwareBenchmark:
                 'Avg_GPU_%': result['avg_gpu_util'],
                 'Max_GPU_%': result['max_gpu_util'],
                 'Avg_GPU_Memory_MB': result['avg_gpu_memory_mb'],
-                'Max_GPU_Memory_MB': result['max_gpu_memory_mb']
+                'Max_GPU_Memory_MB': result['max_gpu_memory_mb'],
+                'Model_RAM_MB': result.get('model_ram_mb', 0.0),
+                'Init_ms': result.get('init_ms', float('nan')),
+                'Tracker_Params': json.dumps(result.get('tracker_params', {}), sort_keys=True)
             })
         
         df_summary = pd.DataFrame(summary_data)
@@ -274,27 +506,59 @@ class HardwareBenchmark:
         df_summary.to_csv(summary_path, index=False)
         print(f"\nSummary saved to: {summary_path}")
         
-        # Full JSON results
-        # Remove frame_data for JSON (too large)
-        json_results = {}
-        for name, result in results.items():
-            json_results[name] = {k: v for k, v in result.items() if k != 'frame_data'}
+        # Full JSON results; per-frame data lives in the frame store
+        json_results = dict(results)
         
         json_path = self.output_dir / 'hardware_benchmark_full.json'
         with open(json_path, 'w') as f:
-            json.dump(json_results, f, indent=2)
+            json.dump(json_results, f, indent=2, default=float)
         print(f"Full results saved to: {json_path}")
         
-        # Frame-by-frame data for MATLAB
+        # Stage-level percentiles, one row per (tracker, phase, stage); init runs once,
+        # so its rows hold that single time in every column
+        stage_data = []
         for tracker_name, result in results.items():
-            if 'frame_data' in result:
-                frame_df = pd.DataFrame(result['frame_data'])
-                frame_df['tracker'] = tracker_name
-                frame_df['frame_number'] = range(len(frame_df))
-                
-                frame_path = self.output_dir / f'{tracker_name}_frame_data.csv'
-                frame_df.to_csv(frame_path, index=False)
-                print(f"{tracker_name} frame data saved to: {frame_path}")
+            init_ms = result.get('init_ms', 0.0)
+            for stage, ms in result.get('init_stage_ms', {}).items():
+                stage_data.append({
+                    'Tracker': result['tracker'],
+                    'Phase': 'init',
+                    'Stage': stage,
+                    'Mean_ms': ms,
+                    'P50_ms': ms,
+                    'P95_ms': ms,
+                    'P99_ms': ms,
+                    'Max_ms': ms,
+                    'Share_%': 100.0 * ms / init_ms if init_ms > 0 else 0.0
+                })
+            for stage, s in result.get('stage_latency_ms', {}).items():
+                stage_data.append({
+                    'Tracker': result['tracker'],
+                    'Phase': 'update',
+                    'Stage': stage,
+                    'Mean_ms': s['mean'],
+                    'P50_ms': s['p50'],
+                    'P95_ms': s['p95'],
+                    'P99_ms': s['p99'],
+                    'Max_ms': s['max'],
+                    # Nested 'parent/child' stages are already counted in their parent
+                    'Share_%': 100.0 * s['mean'] / result['avg_latency_ms']
+                               if result['avg_latency_ms'] > 0 else 0.0
+                })
+        if stage_data:
+            stage_path = self.output_dir / 'hardware_benchmark_stages.csv'
+            pd.DataFrame(stage_data).to_csv(stage_path, index=False)
+            print(f"Stage latencies saved to: {stage_path}")
+        
+        print(f"Per-frame data stored under: {self.frame_store} (run={self.run_id})")
+        
+        # Frame-by-frame CSVs for MATLAB, derived from the frame store
+        if self.frame_csv:
+            for tracker_name, result in results.items():
+                if 'frame_partition' in result:
+                    frame_path = self.output_dir / f'{tracker_name}_frame_data.csv'
+                    export_frame_csv(result['frame_partition'], frame_path, tracker_name)
+                    print(f"{tracker_name} frame data saved to: {frame_path}")
         
         print(f"\n{'='*60}")
         print("BENCHMARK SUMMARY")
@@ -302,16 +566,130 @@ class HardwareBenchmark:
         print(df_summary.to_string(index=False))
         print(f"{'='*60}\n")
 
+def split_core_sets(workers: int) -> List[List[int]]:
+    """Partition the cores available to this process into disjoint sets"""
+    if hasattr(os, 'sched_getaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(psutil.cpu_count()))
+    workers = max(1, min(workers, len(cores)))
+    return [chunk.tolist() for chunk in np.array_split(cores, workers)]
+
+# Core sets not in use by a running task, set in each worker process
+_core_queue = None
+
+def _init_worker(core_queue):
+    """Pool initializer: keep the shared queue of free core sets"""
+    global _core_queue
+    _core_queue = core_queue
+
+def _pin(cores: List[int]):
+    """Bind this process and the thread pools of the libraries it imported to a core set"""
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    else:
+        try:
+            psutil.Process().cpu_affinity(cores)
+        except (AttributeError, psutil.Error):
+            print("Warning: CPU affinity not supported on this platform")
+    cv2.setNumThreads(len(cores))
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(len(cores))
+
+def _benchmark_worker(config: Dict, tracker_name: str, num_frames: int,
+                      warmup_frames: int = 0) -> Dict:
+    """Benchmark one tracker in a worker process with its own psutil monitor"""
+    # At most one task per core set runs at a time, so a free set is always queued
+    cores = _core_queue.get()
+    try:
+        _pin(cores)
+        benchmark = HardwareBenchmark(tracker_names=[tracker_name], **config)
+        # Building the tracker imports torch and may reset thread counts: pin again
+        _pin(cores)
+        result = benchmark.benchmark_tracker(tracker_name, num_frames, warmup_frames)
+        if result:
+            result['cpu_cores'] = cores
+        return result
+    finally:
+        _core_queue.put(cores)
+
 def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Benchmark object trackers')
     parser.add_argument('--video', type=str, default='../test_videos/test.mp4',
                         help='Path to test video')
+    parser.add_argument('--trackers', type=str, default=','.join(DEFAULT_TRACKERS),
+                        help='Comma-separated trackers to benchmark, e.g. CSRT,DiMP-int8; '
+                             'only their modules are imported')
     parser.add_argument('--frames', type=int, default=300,
                         help='Number of frames to process')
+    parser.add_argument('--warmup', type=int, default=0,
+                        help='Frames tracked after init but excluded from the statistics')
     parser.add_argument('--output', type=str, default='../results',
                         help='Output directory for results')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for decoded frame cache (default: next to video)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Run trackers in N pinned worker processes (1 = sequential)')
+    parser.add_argument('--sample-rate', type=float, default=200.0,
+                        help='Hardware sampling rate in Hz for the background sampler')
+    parser.add_argument('--csrt-preset', choices=['fast', 'balanced', 'accurate'], default=None,
+                        help='CSRT parameter preset (default: OpenCV defaults)')
+    parser.add_argument('--csrt-profile', type=str, default=None,
+                        help='YAML/JSON CSRT profile with a preset and/or params overrides')
+    parser.add_argument('--ostrack-model', type=str, default=None,
+                        help='OSTrack ONNX graph or torch state dict (default: untrained torch network)')
+    parser.add_argument('--ostrack-backend', choices=['auto', 'onnxruntime', 'opencv', 'torch'],
+                        default='auto', help='Inference backend for OSTrack')
+    parser.add_argument('--ostrack-threads', type=int, default=None,
+                        help='Intra-op CPU threads for OSTrack inference')
+    parser.add_argument('--ostrack-simulate', action='store_true',
+                        help='Run OSTrack as a drifting-box simulation instead of a network (smoke tests)')
+    parser.add_argument('--precisions', type=str, default='fp32',
+                        help='Comma-separated precisions for OSTrack/SiamRPN++/DiMP, e.g. fp32,bf16,int8')
+    parser.add_argument('--calibration-frames', type=int, default=8,
+                        help='First-frame crops observed in init() before static int8 conversion')
+    parser.add_argument('--dimp-update-interval', type=int, default=10,
+                        help='DiMP: run the filter optimizer every N frames (0 disables online updates)')
+    parser.add_argument('--dimp-update-iters', type=int, default=2,
+                        help='DiMP: steepest-descent iterations per model update')
+    parser.add_argument('--dimp-memory', type=int, default=50,
+                        help='DiMP: training sample memory capacity')
+    parser.add_argument('--dimp-async', action='store_true',
+                        help='DiMP: run model updates on a worker thread')
+    parser.add_argument('--csrt-async', action='store_true',
+                        help='Also benchmark CSRT with model refreshes on a background thread (CSRT-async)')
+    parser.add_argument('--csrt-refresh-interval', type=int, default=10,
+                        help='CSRT-async: frames between background model refreshes')
+    parser.add_argument('--csrt-roi', action='store_true',
+                        help='Also benchmark CSRT on a cropped search window (CSRT-ROI)')
+    parser.add_argument('--roi-padding', type=float, default=5.0,
+                        help='CSRT-ROI window padding in units of sqrt(w*h)')
+    parser.add_argument('--roi-max-side', type=int, default=None,
+                        help='CSRT-ROI: downscale the window so its longer side is at most this')
+    parser.add_argument('--source', choices=['cache', 'live', 'shm'], default='cache',
+                        help='cache: replay pre-decoded frames; live: decode on a prefetch thread; '
+                             'shm: decode in a separate process into a shared-memory frame ring')
+    parser.add_argument('--prefetch-depth', type=int, default=8,
+                        help='Frames decoded ahead in live/shm mode')
+    parser.add_argument('--drop-frames', action='store_true',
+                        help='Live mode: drop the oldest queued frame instead of blocking the decoder '
+                             '(shm: always deliver the newest frame)')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Live mode: pace frames at the source FPS like a camera')
+    parser.add_argument('--frame-store', type=str, default=None,
+                        help='Root of the per-frame columnar store (default: <output>/frames)')
+    parser.add_argument('--run-id', type=str, default=None,
+                        help='Run partition name in the frame store (default: start timestamp)')
+    parser.add_argument('--no-frame-csv', action='store_true',
+                        help='Skip exporting <tracker>_frame_data.csv from the frame store')
+    parser.add_argument('--no-stage-timing', action='store_true',
+                        help='Disable per-stage latency spans inside tracker updates')
+    parser.add_argument('--history', type=str, default=None,
+                        help='Append the results to this results-history database')
+    parser.add_argument('--history-label', type=str, default=None,
+                        help='Label of the recorded run, e.g. a baseline name')
     
     args = parser.parse_args()
     
@@ -321,8 +699,62 @@ def main():
         print("Creating synthetic test video...")
         create_test_video(args.video)
     
-    benchmark = HardwareBenchmark(args.video, args.output)
-    results = benchmark.run_all_benchmarks(args.frames)
+    reader_options = {
+        'depth': args.prefetch_depth,
+        'drop': args.drop_frames,
+        'realtime': args.realtime
+    }
+    if args.drop_frames and not args.realtime:
+        # An unpaced decoder outruns the tracker and the run tracks a handful of frames
+        parser.error('--drop-frames needs --realtime')
+    precisions = [p.strip() for p in args.precisions.split(',') if p.strip()]
+    unknown = sorted(set(precisions) - set(PRECISIONS))
+    if unknown:
+        parser.error(f"unknown precisions {unknown}, expected a subset of {PRECISIONS}")
+    if 'int8' in precisions and args.calibration_frames < 1:
+        parser.error('--calibration-frames must be at least 1 for int8')
+    try:
+        tracker_names = variant_names(parse_names(args.trackers), precisions)
+    except KeyError as e:
+        parser.error(str(e))
+    csrt_options = {'preset': args.csrt_preset, 'profile': args.csrt_profile}
+    deep_options = {'calibration_frames': args.calibration_frames}
+    tracker_options = {
+        'CSRT': csrt_options,
+        'OSTrack': dict(deep_options, model_path=args.ostrack_model,
+                        backend=args.ostrack_backend, num_threads=args.ostrack_threads,
+                        simulate=args.ostrack_simulate),
+        'SiamRPN++': deep_options,
+        'DiMP': dict(deep_options, update_interval=args.dimp_update_interval,
+                     update_iterations=args.dimp_update_iters, memory_size=args.dimp_memory,
+                     async_update=args.dimp_async)
+    }
+    tracker_options['CSRT-async'] = dict(csrt_options, refresh_interval=args.csrt_refresh_interval)
+    tracker_options['CSRT-ROI'] = dict(csrt_options, roi_padding=args.roi_padding,
+                                       roi_max_side=args.roi_max_side)
+    if args.csrt_async and 'CSRT-async' not in tracker_names:
+        tracker_names.insert(1, 'CSRT-async')
+    if args.csrt_roi and 'CSRT-ROI' not in tracker_names:
+        tracker_names.insert(1, 'CSRT-ROI')
+    
+    benchmark = HardwareBenchmark(args.video, args.output, args.cache_dir,
+                                  tracker_names=tracker_names,
+                                  sample_rate_hz=args.sample_rate, frame_source=args.source,
+                                  reader_options=reader_options,
+                                  tracker_options=tracker_options,
+                                  frame_store=args.frame_store, run_id=args.run_id,
+                                  frame_csv=not args.no_frame_csv,
+                                  stage_timing=not args.no_stage_timing)
+    if args.workers > 1:
+        results = benchmark.run_parallel_benchmarks(args.frames, args.workers, args.warmup)
+    else:
+        results = benchmark.run_all_benchmarks(args.frames, args.warmup)
+    
+    if args.history and results:
+        history = ResultsHistory(args.history)
+        run_id = history.record_hardware(results, args.history_label)
+        history.close()
+        print(f"Recorded as run {run_id} in {args.history}")
     
     print("\nBenchmark complete! Results saved to:", args.output)
     print("\nYou can now import these CSV files into MATLAB for analysis.")
@@ -0,0 +1,404 @@
+"""
+Dataset evaluation engine for OTB/LaSOT-style sequences
+Runs a tracker wrapper in "update" and "pure" variants over every sequence and
+writes per-sequence AUC, Success@0.5, Precision@20 and FPS in the auc_compare.csv schema
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from results_history import ResultsHistory
+from tracking_metrics import evaluate_sequences, valid_boxes
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "trackers"))
+from registry import available, create, tracker_class
+
+# Constructor arguments for the two columns of auc_compare.csv, plus optional variants;
+# a variant is only offered for trackers whose constructor takes its arguments
+VARIANTS = {
+    "update": {},
+    "pure": {"update_model": False},
+    "async": {"async_update": True},
+}
+DEFAULT_VARIANTS = ["update", "pure"]
+
+GROUNDTRUTH_NAMES = ("groundtruth_rect*.txt", "groundtruth.txt")
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+# OTB sequences whose annotation covers only part of the image folder: (first, last)
+# annotated frame numbers, from the OTB toolkit's configSeqs
+OTB_FRAME_RANGES = {
+    "David": (300, 770),
+    "Tiger1": (6, 354),
+    "BlurCar1": (247, 988),
+    "BlurCar3": (3, 359),
+    "BlurCar4": (18, 397),
+    "Football1": (1, 74),
+    "Freeman3": (1, 460),
+    "Freeman4": (1, 283),
+    "Diving": (1, 215),
+    "Board": (1, 698),
+}
+
+# Accuracy columns of auc_compare.csv, per variant
+ACCURACY_METRICS = ("auc", "success50", "precision20", "norm_precision20")
+
+
+def make_tracker(name, keyframe=None, **kwargs):
+    """
+    Construct a fresh tracker from the registry (importing only its module)
+    `keyframe` holds KeyframeTracker arguments to run it on keyframes only
+    """
+    tracker = create(name, **kwargs)
+    if keyframe is not None:
+        from keyframe_tracker import KeyframeTracker
+        tracker = KeyframeTracker(tracker, **keyframe)
+    return tracker
+
+
+def accepts(tracker_name, kwargs):
+    """True if the tracker's constructor takes all of these arguments"""
+    accepted = inspect.signature(tracker_class(tracker_name)).parameters
+    return all(k in accepted for k in kwargs)
+
+
+def supported_variants(tracker_name):
+    """Variants whose constructor arguments the tracker accepts"""
+    return [v for v, kwargs in VARIANTS.items() if accepts(tracker_name, kwargs)]
+
+
+def check_variants(tracker_name, variants, tracker_kwargs=None):
+    """
+    Construct every variant once so unsupported arguments fail before any sequence runs
+    Returns:
+        {variant: effective tracker parameters}
+    """
+    params = {}
+    for variant in variants:
+        try:
+            tracker = make_tracker(tracker_name, **(tracker_kwargs or {}), **VARIANTS[variant])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"variant '{variant}' is not supported by {tracker_name} "
+                             f"(supported: {', '.join(supported_variants(tracker_name))}): {e}") from e
+        params[variant] = tracker.get_params() if hasattr(tracker, "get_params") else {}
+        if hasattr(tracker, "close"):
+            tracker.close()
+    return params
+
+
+def load_groundtruth(path):
+    """Parse a ground-truth file with comma, tab or space separated x, y, w, h rows"""
+    rows = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append([float(v) for v in re.split(r"[,\s]+", line)[:4]])
+    return np.array(rows, dtype=np.float64).reshape(-1, 4)
+
+
+def frame_number(path):
+    """Frame number of an image named like 0001.jpg, or None"""
+    digits = re.search(r"(\d+)$", path.stem)
+    return int(digits.group(1)) if digits else None
+
+
+def find_sequences(root):
+    """
+    Walk a dataset directory for sequences
+    OTB: <seq>/img/*.jpg + groundtruth_rect.txt (groundtruth_rect.N.txt for multi-target
+    sequences, reported as <seq>_N as in auc_compare.csv). LaSOT: <class>/<seq>/img/*.jpg
+    + groundtruth.txt. Ground-truth row i belongs to the image numbered start + i, where
+    start comes from OTB_FRAME_RANGES (default 1); sequences whose images and annotation
+    cannot be matched up, or whose first box is invalid, are skipped with a warning.
+    """
+    sequences = []
+    for pattern in GROUNDTRUTH_NAMES:
+        for gt_path in sorted(Path(root).rglob(pattern)):
+            seq_dir = gt_path.parent
+            img_dir = seq_dir / "img" if (seq_dir / "img").is_dir() else seq_dir
+            frames = sorted(p for p in img_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+            if not frames:
+                continue
+
+            name = seq_dir.name
+            suffix = gt_path.name[len("groundtruth_rect"):-len(".txt")].strip(".")
+            if suffix:
+                name = f"{name}_{suffix}"
+
+            gt = load_groundtruth(gt_path)
+            start, end = OTB_FRAME_RANGES.get(seq_dir.name, (1, None))
+            numbers = [frame_number(p) for p in frames]
+            if None in numbers:
+                # Unnumbered images: only a one-to-one match can be trusted
+                matched = frames if len(frames) == len(gt) and start == 1 else None
+            else:
+                by_number = dict(zip(numbers, frames))
+                wanted = range(start, start + len(gt))
+                matched = [by_number[i] for i in wanted] if all(i in by_number for i in wanted) else None
+                if matched is not None and end is None and len(frames) != len(gt):
+                    # Annotation shorter than the folder without a known range: start unknown
+                    matched = None
+            if matched is None:
+                print(f"Warning: skipping {name}: {len(frames)} images vs {len(gt)} ground-truth rows "
+                      f"(annotation starting at frame {start})")
+                continue
+            if not valid_boxes(gt[:1])[0]:
+                print(f"Warning: skipping {name}: first ground-truth box {gt[0].tolist()} is invalid")
+                continue
+            sequences.append({"name": name, "frames": matched, "groundtruth": gt})
+    return sorted(sequences, key=lambda s: s["name"])
+
+
+def run_sequence(tracker, sequence):
+    """
+    Track one sequence, initializing on the first ground-truth box
+    Returns:
+        (N, 4) predicted boxes (frame 0 is the init box) and total update time in seconds
+    """
+    gt = sequence["groundtruth"]
+    pred = np.zeros_like(gt)
+    pred[0] = gt[0]
+
+    frame = cv2.imread(str(sequence["frames"][0]))
+    tracker.init(frame, tuple(int(round(v)) for v in gt[0]))
+
+    elapsed = 0.0
+    for i, frame_path in enumerate(sequence["frames"][1:], start=1):
+        frame = cv2.imread(str(frame_path))
+        start = time.perf_counter()
+        _, bbox = tracker.update(frame)
+        elapsed += time.perf_counter() - start
+        pred[i] = bbox
+    if hasattr(tracker, "close"):
+        tracker.close()
+    return pred, elapsed
+
+
+def config_key(tracker_name, tracker_kwargs):
+    """
+    Short hash of the effective tracker configuration
+    Checkpoints are keyed by it, so changing a preset or profile never reuses stale boxes
+    """
+    tracker = make_tracker(tracker_name, **tracker_kwargs)
+    config = tracker.get_params() if hasattr(tracker, "get_params") else tracker_kwargs
+    raw = json.dumps({"tracker": tracker_name, "config": config}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def checkpoint_path(checkpoint_dir, key, sequence_name):
+    return Path(checkpoint_dir) / key / f"{sequence_name}.npz"
+
+
+def load_checkpoint(path):
+    """Load the predicted boxes, update time and keyframe count saved for one sequence"""
+    with np.load(path) as data:
+        result = {"pred": data["pred"], "elapsed": float(data["elapsed"])}
+        if "keyframes" in data:
+            result["keyframes"] = int(data["keyframes"])
+        return result
+
+
+def _evaluate_task(tracker_name, tracker_kwargs, sequence, path, label):
+    """Track one sequence with one configuration and persist its boxes as soon as it finishes"""
+    tracker = make_tracker(tracker_name, **tracker_kwargs)
+    pred, elapsed = run_sequence(tracker, sequence)
+    # Keyframe schedules also record how many frames ran the real tracker
+    extras = {"keyframes": tracker.keyframes} if hasattr(tracker, "keyframes") else {}
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.stem + ".tmp.npz")
+    np.savez(tmp_path, pred=pred, elapsed=elapsed, **extras)
+    # Atomic rename so an interrupted write never looks like a finished sequence
+    os.replace(tmp_path, path)
+    return label, sequence["name"], len(pred), elapsed
+
+
+def _init_worker():
+    # One OpenCV thread per process; parallelism comes from the pool
+    cv2.setNumThreads(1)
+
+
+def run_tasks(tasks, workers=1):
+    """
+    Run (tracker_name, tracker_kwargs, sequence, checkpoint path, label) tasks whose
+    checkpoint does not exist yet, longest sequence first
+    Returns:
+        Number of tasks skipped because they were already checkpointed
+    """
+    pending = [t for t in tasks if not t[3].exists()]
+    # Longest sequences first so the pool does not wait on a long tail
+    pending.sort(key=lambda t: len(t[2]["groundtruth"]), reverse=True)
+
+    def report(label, name, frames, elapsed):
+        print(f"[{label}] {name}: {frames} frames, {(frames - 1) / max(elapsed, 1e-9):.1f} FPS")
+
+    if workers > 1 and pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_evaluate_task, *task) for task in pending]
+            for future in as_completed(futures):
+                report(*future.result())
+    else:
+        for task in pending:
+            report(*_evaluate_task(*task))
+    return len(tasks) - len(pending)
+
+
+def evaluate(tracker_name, variants, sequences, checkpoint_dir, workers=1, tracker_kwargs=None):
+    """
+    Run all (variant, sequence) pairs, skipping those with an existing checkpoint
+    Args:
+        tracker_name: Registered tracker name
+        variants: Variant names from VARIANTS
+        sequences: Sequences from find_sequences
+        checkpoint_dir: Directory holding <variant>-<config hash>/<sequence>.npz boxes
+        workers: Number of worker processes (1 = run in this process)
+        tracker_kwargs: Extra constructor arguments shared by all variants
+    Returns:
+        {variant: {sequence name: {"pred", "elapsed"}}}
+    """
+    tracker_kwargs = tracker_kwargs or {}
+    tasks = []
+    paths = {}
+    for variant in variants:
+        kwargs = dict(tracker_kwargs, **VARIANTS[variant])
+        key = f"{variant}-{config_key(tracker_name, kwargs)}"
+        for sequence in sequences:
+            path = checkpoint_path(checkpoint_dir, key, sequence["name"])
+            paths[variant, sequence["name"]] = path
+            tasks.append((tracker_name, kwargs, sequence, path, variant))
+
+    done = run_tasks(tasks, workers)
+    if done:
+        print(f"Resumed: {done} sequence runs were already checkpointed in {checkpoint_dir}")
+
+    return {
+        variant: {s["name"]: load_checkpoint(paths[variant, s["name"]]) for s in sequences}
+        for variant in variants
+    }
+
+
+def score_sequences(sequences, results):
+    """Score every sequence of one variant in a single pass over the concatenated boxes"""
+    gt = np.concatenate([s["groundtruth"] for s in sequences])
+    pred = np.concatenate([results[s["name"]]["pred"] for s in sequences])
+    offsets = np.cumsum([0] + [len(s["groundtruth"]) for s in sequences])
+    return evaluate_sequences(pred, gt, offsets)
+
+
+def pooled_metrics(sequences, results, scores=None):
+    """Metrics over all frames pooled; FPS is total updates over total update time"""
+    scores = scores or score_sequences(sequences, results)
+    metrics = {metric: scores["overall"][metric] for metric in ACCURACY_METRICS}
+    updates = sum(len(s["groundtruth"]) - 1 for s in sequences)
+    elapsed = sum(results[s["name"]]["elapsed"] for s in sequences)
+    metrics["fps"] = updates / elapsed if elapsed > 0 else 0.0
+    return metrics
+
+
+def build_table(sequences, variant_results):
+    """Assemble per-sequence rows plus a pooled OVERALL row"""
+    rows = [{"sequence": s["name"], "frames": len(s["groundtruth"])} for s in sequences]
+    # OVERALL pools all frames
+    overall = {"sequence": "OVERALL", "frames": sum(len(s["groundtruth"]) for s in sequences)}
+    for variant, results in variant_results.items():
+        scores = score_sequences(sequences, results)
+        for i, (row, sequence) in enumerate(zip(rows, sequences)):
+            for metric in ACCURACY_METRICS:
+                row[f"{metric}_{variant}"] = float(scores[metric][i])
+            elapsed = results[sequence["name"]]["elapsed"]
+            row[f"fps_{variant}"] = (len(sequence["groundtruth"]) - 1) / elapsed if elapsed > 0 else 0.0
+        for metric, value in pooled_metrics(sequences, results, scores).items():
+            overall[f"{metric}_{variant}"] = value
+    rows.append(overall)
+
+    df = pd.DataFrame(rows)
+    columns = ["sequence", "frames"]
+    for metric in ACCURACY_METRICS + ("fps",):
+        columns += [f"{metric}_{variant}" for variant in variant_results]
+    df = df[columns]
+    if {"update", "pure"} <= set(variant_results):
+        df["delta_auc"] = df["auc_update"] - df["auc_pure"]
+    return df
+
+
+def main():
+    root_dir = Path(__file__).resolve().parents[1]
+    default_out = root_dir / "auc_compare.csv"
+
+    parser = argparse.ArgumentParser(description="Evaluate a tracker on an OTB/LaSOT-style dataset.")
+    parser.add_argument("--dataset", type=Path, required=True)
+    parser.add_argument("--tracker", default="CSRT", choices=available())
+    parser.add_argument("--variants", nargs="+", default=None, choices=list(VARIANTS),
+                        help="Default: update and pure where the tracker supports them")
+    parser.add_argument("--sequences", nargs="*", help="Only evaluate these sequence names")
+    parser.add_argument("--out", type=Path, default=default_out)
+    parser.add_argument("--preset", choices=["fast", "balanced", "accurate"], default=None,
+                        help="CSRT parameter preset")
+    parser.add_argument("--profile", type=Path, default=None,
+                        help="YAML/JSON CSRT profile with a preset and/or params overrides")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for sequences")
+    parser.add_argument("--checkpoint-dir", type=Path, default=None,
+                        help="Per-sequence box checkpoints (default: results/eval_checkpoints/<tracker>)")
+    parser.add_argument("--history", type=Path, default=None,
+                        help="Append the table to this results-history database")
+    parser.add_argument("--history-label", default=None, help="Label of the recorded run")
+    args = parser.parse_args()
+
+    tracker_kwargs = {}
+    if args.preset or args.profile:
+        tracker_kwargs = {"preset": args.preset, "profile": args.profile}
+        if not accepts(args.tracker, tracker_kwargs):
+            parser.error(f"--preset/--profile are CSRT options, {args.tracker} does not take them")
+    if args.variants is None:
+        supported = supported_variants(args.tracker)
+        args.variants = [v for v in DEFAULT_VARIANTS if v in supported]
+    try:
+        # Effective tracker parameters, recorded next to the metrics
+        params = check_variants(args.tracker, args.variants, tracker_kwargs)
+    except ValueError as e:
+        parser.error(str(e))
+    checkpoint_dir = args.checkpoint_dir or root_dir / "results" / "eval_checkpoints" / args.tracker
+
+    sequences = find_sequences(args.dataset)
+    if args.sequences:
+        sequences = [s for s in sequences if s["name"] in set(args.sequences)]
+    if not sequences:
+        raise SystemExit(f"No sequences found under {args.dataset}")
+    print(f"Found {len(sequences)} sequences, {sum(len(s['groundtruth']) for s in sequences)} frames")
+
+    variant_results = evaluate(args.tracker, args.variants, sequences, checkpoint_dir,
+                               args.workers, tracker_kwargs)
+
+    df = build_table(sequences, variant_results)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.out, index=False, float_format="%.4f")
+    print(f"Wrote {args.out}")
+
+    params_path = args.out.with_suffix(".params.json")
+    with open(params_path, "w") as f:
+        json.dump({"tracker": args.tracker, "variants": params}, f, indent=2, default=str)
+    print(f"Wrote {params_path}")
+
+    if args.history:
+        history = ResultsHistory(args.history)
+        run_id = history.record_accuracy(df, args.tracker, {"tracker": args.tracker, "variants": params},
+                                         args.history_label)
+        history.close()
+        print(f"Recorded as run {run_id} in {args.history}")
+    print(df[df["sequence"] == "OVERALL"].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
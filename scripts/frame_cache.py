@@ -0,0 +1,110 @@
+"""
+Decoded frame cache shared by all trackers in a benchmark run
+Decodes a video once into a raw uint8 .npy file and replays it via memory mapping
+"""
+import cv2
+import numpy as np
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+
+class FrameCache:
+    """Memory-mapped store of decoded frames, keyed by video path and mtime"""
+
+    def __init__(self, video_path: str, cache_dir: Optional[str] = None,
+                 max_bytes: int = 4 * 1024 ** 3):
+        self.video_path = str(Path(video_path).resolve())
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(self.video_path).parent / '.frame_cache'
+        self.max_bytes = max_bytes
+        self.frames = None
+        self.complete = False
+
+    def _cache_key(self) -> str:
+        """Build cache key from video identity so edited videos are re-decoded"""
+        mtime = os.stat(self.video_path).st_mtime_ns
+        raw = f"{self.video_path}|{mtime}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+    def _covers(self, num_frames: int) -> bool:
+        """True if the loaded frames answer a request for num_frames"""
+        return self.frames is not None and (self.complete or len(self.frames) >= num_frames)
+
+    def load(self, num_frames: int) -> Optional[np.ndarray]:
+        """
+        Return up to num_frames decoded frames as a read-only (N, H, W, 3) memmap
+        Any request up to the stored frame count is served from the same file; the
+        video is only decoded again when more frames are needed than were stored
+        Args:
+            num_frames: Number of frames needed by the benchmark
+        Returns:
+            Memory-mapped uint8 array, or None if the video cannot be read
+        """
+        if self._covers(num_frames):
+            return self.frames[:num_frames]
+
+        key = self._cache_key()
+        npy_path = self.cache_dir / f"{Path(self.video_path).stem}_{key}.npy"
+        meta_path = npy_path.with_suffix('.json')
+
+        if npy_path.exists() and meta_path.exists():
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.frames = np.load(npy_path, mmap_mode='r')[:meta['frames']]
+            self.complete = meta.get('complete', False)
+            if self._covers(num_frames):
+                print(f"Using cached frames: {npy_path} ({meta['frames']} frames)")
+                return self.frames[:num_frames]
+
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            print(f"Error: Cannot open video {self.video_path}")
+            return None
+
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if total > 0:
+            num_frames = min(num_frames, total)
+
+        # Bound the store so long or high-resolution videos cannot fill the disk
+        limit = self.max_bytes // max(1, width * height * 3)
+        num_frames = max(1, min(num_frames, limit))
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = npy_path.with_name(npy_path.stem + '.tmp.npy')
+        store = None
+        decoded = 0
+
+        print(f"Decoding {num_frames} frames into {npy_path}...")
+        while decoded < num_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if store is None:
+                # Allocate from the first decoded frame in case the container reports no size
+                store = np.lib.format.open_memmap(
+                    tmp_path, mode='w+', dtype=np.uint8,
+                    shape=(num_frames,) + frame.shape)
+            store[decoded] = frame
+            decoded += 1
+        cap.release()
+
+        if store is None:
+            print("Error: Cannot read first frame")
+            return None
+
+        store.flush()
+        del store
+        # Readers still mapping the shorter file keep its inode until they drop it
+        os.replace(tmp_path, npy_path)
+        # Complete: the video or the size bound ran out, longer requests get no more frames
+        complete = decoded < num_frames or decoded >= limit or 0 < total <= decoded
+        with open(meta_path, 'w') as f:
+            json.dump({'video': self.video_path, 'frames': decoded, 'complete': complete}, f)
+
+        self.frames = np.load(npy_path, mmap_mode='r')[:decoded]
+        self.complete = complete
+        return self.frames
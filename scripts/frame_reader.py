@@ -0,0 +1,154 @@
+"""
+Prefetching threaded frame reader
+Decodes ahead on a separate thread into a bounded queue so decode overlaps tracking;
+optionally paces frames at the source FPS to emulate a live camera feed
+"""
+import cv2
+import queue
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+_END = object()
+
+
+class PrefetchReader:
+    """cv2.VideoCapture-like reader backed by a decode thread and a bounded frame queue"""
+
+    def __init__(self, source, depth: int = 8, drop: bool = False,
+                 realtime: bool = False, fps: Optional[float] = None,
+                 max_frames: Optional[int] = None):
+        """
+        Args:
+            source: Video path or camera index passed to cv2.VideoCapture
+            depth: Number of decoded frames buffered ahead of the consumer
+            drop: If the queue is full, drop the oldest frame (live camera) instead
+                of blocking the decoder (lossless file replay)
+            realtime: Release frames at the source FPS instead of as fast as possible
+            fps: Override the pacing rate (default: container FPS, else 30)
+            max_frames: Stop after decoding this many frames
+        """
+        self.cap = cv2.VideoCapture(source)
+        self.depth = depth
+        self.drop = drop
+        self.realtime = realtime
+        self.max_frames = max_frames
+
+        source_fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.fps = fps or (source_fps if source_fps and source_fps > 0 else 30.0)
+
+        self.decoded = 0
+        self.dropped = 0
+        self.ended = False
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def start(self):
+        """Start the decode thread"""
+        self._thread = threading.Thread(target=self._run, name='frame-reader', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            if self.max_frames is not None and self.decoded >= self.max_frames:
+                break
+
+            if self.realtime:
+                # A camera produces frame i at start + i / fps regardless of the consumer
+                delay = start + self.decoded / self.fps - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.decoded += 1
+            item = (frame, time.perf_counter())
+
+            if self.drop:
+                while True:
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        try:
+                            self._queue.get_nowait()
+                            self.dropped += 1
+                        except queue.Empty:
+                            pass
+            else:
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+        self._put_end()
+
+    def _put_end(self):
+        while True:
+            try:
+                self._queue.put(_END, timeout=0.1)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    return
+                if not self.drop:
+                    # Lossless replay: wait for the consumer, never discard a frame
+                    continue
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def read_timed(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Return the next frame and the perf_counter time it was decoded
+        Args:
+            timeout: Seconds to wait for a frame (None blocks, 0 polls)
+        Returns:
+            ret, frame, capture_time; ret is False at end of stream (ended is set)
+            or when no frame arrived within timeout
+        """
+        if self._thread is None:
+            self.start()
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return False, None, 0.0
+        if item is _END:
+            self.ended = True
+            # Keep returning end-of-stream on repeated reads
+            self._queue.put(_END)
+            return False, None, 0.0
+        frame, captured = item
+        return True, frame, captured
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Same contract as cv2.VideoCapture.read"""
+        ret, frame, _ = self.read_timed()
+        return ret, frame
+
+    def release(self):
+        """Stop the decode thread and release the capture"""
+        self._stop.set()
+        if self._thread is not None:
+            # Unblock a decoder waiting on a full queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._thread.join(timeout=0.05)
+            self._thread = None
+        self.cap.release()
@@ -0,0 +1,295 @@
+"""
+Columnar per-frame store
+Per-frame benchmark records are appended as chunked .npz files (one array per column)
+under tracker=<name>/video=<name>/run=<id>/ partitions, and read back lazily with
+column projection; the per-tracker CSVs used by MATLAB are derived from it
+"""
+import json
+import math
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from streaming_stats import StreamingMetric
+
+PARTITION_KEYS = ('tracker', 'video', 'run')
+
+# Store column -> <tracker>_frame_data.csv column read by analyze_hardware_matlab.m
+CSV_COLUMNS = {
+    'latency_ms': 'latencies',
+    'cpu_percent': 'cpu_usage',
+    'ram_mb': 'ram_usage',
+    'gpu_util': 'gpu_usage',
+    'gpu_memory_mb': 'gpu_memory'
+}
+
+
+def stage_column(stage: str) -> str:
+    """Store column holding one tracker stage's per-frame time (nested 'a/b' -> 'a.b')"""
+    return f"stage_{stage.replace('/', '.')}_ms"
+
+
+def partition_path(root, tracker: str, video: str, run: str) -> Path:
+    """Directory holding the chunks of one (tracker, video, run)"""
+    return Path(root) / f'tracker={tracker}' / f'video={video}' / f'run={run}'
+
+
+class FrameWriter:
+    """Append-only writer: each write() becomes one immutable chunk file"""
+
+    def __init__(self, root, tracker: str, video: str, run: str):
+        """
+        Args:
+            root: Store root directory
+            tracker, video, run: Partition values
+        """
+        self.path = partition_path(root, tracker, video, run)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.partition = {'tracker': tracker, 'video': video, 'run': run}
+        self.chunks = len(list(self.path.glob('part-*.npz')))
+        self.rows = 0
+        self.columns = {}
+
+    def write(self, **columns: np.ndarray):
+        """Append one chunk; all columns must have the same length"""
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError(f'Column lengths differ: {sorted(lengths)}')
+        n = lengths.pop()
+        if n == 0:
+            return
+        for name, values in columns.items():
+            self.columns.setdefault(name, str(np.asarray(values).dtype))
+
+        # Write under a temporary name so readers never see a partial chunk
+        final = self.path / f'part-{self.chunks:05d}.npz'
+        tmp = self.path / f'.part-{self.chunks:05d}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp, final)
+        self.chunks += 1
+        self.rows += n
+
+    def close(self, **metadata):
+        """Record the schema, row count and any extra metadata next to the chunks"""
+        meta = dict(self.partition, rows=self.rows, chunks=self.chunks,
+                    columns=self.columns, **metadata)
+        with open(self.path / '_meta.json', 'w') as f:
+            json.dump(meta, f, indent=2, default=str)
+
+
+class StreamingFrameWriter:
+    """
+    Per-frame recorder with constant memory
+    Frames go into preallocated ring buffers holding two chunks. Buffered frames are
+    flushed to a FrameWriter once a chunk is full (or the oldest has waited too long)
+    and they ended long enough ago for the hardware sampler to cover them; summaries
+    are kept as streaming moments and quantile sketches, available at any time.
+    """
+
+    def __init__(self, writer: FrameWriter, attribute: Callable, baseline_ram_mb: float = 0.0,
+                 chunk_size: int = 4096, flush_lag: float = 0.25, max_pending_seconds: float = 60.0,
+                 stages=()):
+        """
+        Args:
+            writer: Destination partition
+            attribute: HardwareSampler.attribute-like callable mapping frame start/end
+                times to per-frame cpu_percent, ram_mb, gpu_util and gpu_memory_mb
+            baseline_ram_mb: Subtracted from RSS, so ram_mb is the growth during the run
+            chunk_size: Frames per chunk file
+            flush_lag: Seconds a frame must have ended before it is attributed and flushed
+            max_pending_seconds: Flush a partial chunk once its oldest frame is this old,
+                so slow trackers stay inside the sampler's ring window
+            stages: StageTimer stage names; record() then takes each frame's stage times
+        """
+        self.writer = writer
+        self.attribute = attribute
+        self.baseline_ram_mb = baseline_ram_mb
+        self.chunk_size = chunk_size
+        self.flush_lag = flush_lag
+        self.max_pending_seconds = max_pending_seconds
+
+        self.size = 2 * chunk_size
+        self.start_time = np.zeros(self.size)
+        self.end_time = np.zeros(self.size)
+        self.capture_time = np.full(self.size, np.nan)
+        self.boxes = np.zeros((self.size, 4))
+        self.success = np.zeros(self.size, dtype=bool)
+        self.stages = tuple(stages)
+        self.stage_ns = np.zeros((self.size, len(self.stages)), dtype=np.int64)
+        self.count = 0
+        self.flushed = 0
+        self.busy_seconds = 0.0
+
+        self.metrics = {
+            'latency_ms': StreamingMetric(quantiles=True),
+            'e2e_latency_ms': StreamingMetric(quantiles=True),
+            'cpu_percent': StreamingMetric(),
+            'ram_mb': StreamingMetric(),
+            'gpu_util': StreamingMetric(),
+            'gpu_memory_mb': StreamingMetric()
+        }
+        self.stage_metrics = {stage: StreamingMetric(quantiles=True) for stage in self.stages}
+
+    def record(self, start: float, end: float, success: bool, bbox, captured: float = math.nan,
+               stage_ns=None):
+        """
+        Store one frame's timestamps and result; flushes when a chunk is due
+        Args:
+            stage_ns: Per-stage nanoseconds in `stages` order (StageTimer.frame_ns())
+        """
+        i = self.count % self.size
+        self.start_time[i] = start
+        self.end_time[i] = end
+        self.capture_time[i] = captured
+        self.success[i] = success
+        self.boxes[i] = bbox if success else 0.0
+        if stage_ns is not None:
+            self.stage_ns[i] = stage_ns
+        self.count += 1
+        self.busy_seconds += end - start
+
+        pending = self.count - self.flushed
+        if pending >= self.chunk_size or \
+                end - self.start_time[self.flushed % self.size] > self.max_pending_seconds:
+            self.flush(end - self.flush_lag)
+
+    def flush(self, before: float = math.inf):
+        """Write buffered frames that ended before `before` (default: all), one chunk at a time"""
+        while self.flushed < self.count:
+            lo = self.flushed
+            idx = np.arange(lo, min(self.count, lo + self.chunk_size)) % self.size
+            n = int(np.searchsorted(self.end_time[idx], before, side='right'))
+            if self.count - lo >= self.size:
+                # Ring is full: the next frame would overwrite unflushed data
+                n = len(idx)
+            if n == 0:
+                return
+            self._write(lo, idx[:n])
+            self.flushed += n
+
+    def _write(self, lo: int, idx: np.ndarray):
+        start, end = self.start_time[idx], self.end_time[idx]
+        capture = self.capture_time[idx]
+        hw = self.attribute(start, end)
+        columns = {
+            'latency_ms': (end - start) * 1000,
+            'cpu_percent': hw['cpu_percent'],
+            'ram_mb': hw['ram_mb'] - self.baseline_ram_mb,
+            'gpu_util': hw['gpu_util'],
+            'gpu_memory_mb': hw['gpu_memory_mb']
+        }
+        for name, values in columns.items():
+            self.metrics[name].update(values)
+        self.metrics['e2e_latency_ms'].update((end - capture) * 1000)
+
+        stage_ms = self.stage_ns[idx] / 1e6
+        for j, stage in enumerate(self.stages):
+            columns[stage_column(stage)] = stage_ms[:, j]
+            self.stage_metrics[stage].update(stage_ms[:, j])
+
+        boxes = self.boxes[idx]
+        self.writer.write(frame=np.arange(lo, lo + len(idx)), **columns,
+                          start_time=start, end_time=end, capture_time=capture,
+                          x=boxes[:, 0], y=boxes[:, 1], w=boxes[:, 2], h=boxes[:, 3],
+                          success=self.success[idx])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Streaming summaries of the frames flushed so far"""
+        return {name: metric.summary() for name, metric in self.metrics.items()}
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage time summaries (ms) of the frames flushed so far; stages that never ran are left out"""
+        return {stage: metric.summary() for stage, metric in self.stage_metrics.items()
+                if metric.moments.count and metric.moments.max > 0}
+
+    def close(self, **metadata):
+        """Flush everything and close the partition"""
+        self.flush()
+        self.writer.close(**metadata)
+
+
+def read_partition(path, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Concatenate the chunks of one partition
+    Args:
+        path: Partition directory
+        columns: Columns to load (default: all); other columns are never read
+    Returns:
+        Column name -> array
+    """
+    chunks = [c for c in _iter_partition(Path(path), columns)]
+    if not chunks:
+        return {}
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+
+
+def _iter_partition(path: Path, columns: Optional[List[str]]) -> Iterator[Dict[str, np.ndarray]]:
+    for part in sorted(path.glob('part-*.npz')):
+        # NpzFile reads a member only when it is accessed
+        with np.load(part) as npz:
+            names = columns if columns is not None else npz.files
+            yield {name: npz[name] for name in names if name in npz.files}
+
+
+class FrameStore:
+    """Lazy reader over every partition under a store root"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def partitions(self, **filters) -> List[Dict]:
+        """
+        Partitions matching the given tracker/video/run values
+        Returns:
+            Dicts with the partition values and 'path'
+        """
+        unknown = set(filters) - set(PARTITION_KEYS)
+        if unknown:
+            raise ValueError(f'Unknown partition keys {sorted(unknown)}, expected {PARTITION_KEYS}')
+        found = []
+        for path in sorted(self.root.glob('tracker=*/video=*/run=*')):
+            values = dict(part.split('=', 1) for part in path.relative_to(self.root).parts)
+            if all(values[k] == str(v) for k, v in filters.items() if v is not None):
+                found.append(dict(values, path=path))
+        return found
+
+    def iter_chunks(self, columns: Optional[List[str]] = None, **filters) -> Iterator[Dict]:
+        """Yield one dict of column arrays per chunk, plus its partition values"""
+        for partition in self.partitions(**filters):
+            values = {k: partition[k] for k in PARTITION_KEYS}
+            for chunk in _iter_partition(partition['path'], columns):
+                yield dict(chunk, **values)
+
+    def read(self, columns: Optional[List[str]] = None, **filters) -> pd.DataFrame:
+        """Load the selected columns of all matching partitions into one DataFrame"""
+        frames = []
+        for partition in self.partitions(**filters):
+            data = read_partition(partition['path'], columns)
+            if not data:
+                continue
+            df = pd.DataFrame(data)
+            for key in PARTITION_KEYS:
+                df[key] = partition[key]
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=list(columns or []) + list(PARTITION_KEYS))
+        return pd.concat(frames, ignore_index=True)
+
+
+def export_frame_csv(partition, csv_path, tracker_name: str):
+    """Derive the per-tracker CSV read by analyze_hardware_matlab.m from a partition"""
+    data = read_partition(partition, list(CSV_COLUMNS))
+    df = pd.DataFrame({CSV_COLUMNS[k]: v for k, v in data.items()})
+    df['tracker'] = tracker_name
+    df['frame_number'] = range(len(df))
+    df.to_csv(csv_path, index=False)
+
+
+def safe_name(value: str) -> str:
+    """Partition value usable as a directory name"""
+    return re.sub(r'[^A-Za-z0-9_.+-]', '_', value)
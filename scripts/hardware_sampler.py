@@ -0,0 +1,156 @@
+"""
+Background hardware sampler
+Records CPU time, RSS and GPU usage on a dedicated thread so the timed tracking loop
+only stores frame timestamps; per-frame metrics are attributed after the run
+"""
+import numpy as np
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import psutil
+
+# Try to import GPUtil (optional)
+try:
+    import GPUtil
+    GPU_AVAILABLE = True
+except ImportError:
+    GPU_AVAILABLE = False
+
+
+class HardwareSampler:
+    """Fixed-rate sampler writing into a preallocated ring buffer with monotonic timestamps"""
+
+    def __init__(self, pid: Optional[int] = None, rate_hz: float = 200.0,
+                 max_seconds: float = 600.0, gpu_interval: float = 0.5):
+        """
+        Args:
+            pid: Process to monitor (default: current process)
+            rate_hz: Sampling rate for CPU and RSS
+            max_seconds: Ring capacity in seconds; older samples are overwritten
+            gpu_interval: Seconds between GPU polls (GPUtil shells out to nvidia-smi)
+        """
+        self.process = psutil.Process(pid or os.getpid())
+        self.interval = 1.0 / rate_hz
+        self.gpu_interval = gpu_interval
+        self.capacity = max(2, int(rate_hz * max_seconds))
+
+        # Timestamps use perf_counter, the same monotonic clock as the tracking loop
+        self._t = np.zeros(self.capacity)
+        self._cpu_s = np.zeros(self.capacity)
+        self._rss_mb = np.zeros(self.capacity)
+        self._gpu_util = np.zeros(self.capacity)
+        self._gpu_mem = np.zeros(self.capacity)
+        self._count = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start sampling on a daemon thread"""
+        self._count = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='hardware-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll_gpu(self):
+        if not GPU_AVAILABLE:
+            return 0.0, 0.0
+        try:
+            gpus = GPUtil.getGPUs()
+        except Exception:
+            return 0.0, 0.0
+        if not gpus:
+            return 0.0, 0.0
+        return gpus[0].load * 100, gpus[0].memoryUsed
+
+    def _run(self):
+        gpu_util, gpu_mem = self._poll_gpu()
+        next_gpu = time.perf_counter() + self.gpu_interval
+        next_sample = time.perf_counter()
+
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if now >= next_gpu:
+                gpu_util, gpu_mem = self._poll_gpu()
+                next_gpu = now + self.gpu_interval
+
+            cpu = self.process.cpu_times()
+            i = self._count % self.capacity
+            self._t[i] = time.perf_counter()
+            self._cpu_s[i] = cpu.user + cpu.system
+            self._rss_mb[i] = self.process.memory_info().rss / 1024 / 1024
+            self._gpu_util[i] = gpu_util
+            self._gpu_mem[i] = gpu_mem
+            self._count += 1
+
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind; resynchronize instead of bursting
+                next_sample = time.perf_counter()
+
+    def samples(self) -> Dict[str, np.ndarray]:
+        """Return buffered samples in chronological order"""
+        n = min(self._count, self.capacity)
+        start = self._count % self.capacity if self._count > self.capacity else 0
+        order = (np.arange(n) + start) % self.capacity
+        return {
+            'time': self._t[order],
+            'cpu_seconds': self._cpu_s[order],
+            'ram_mb': self._rss_mb[order],
+            'gpu_util': self._gpu_util[order],
+            'gpu_memory_mb': self._gpu_mem[order]
+        }
+
+    def attribute(self, start_times: np.ndarray, end_times: np.ndarray,
+                  min_window: float = 0.1) -> Dict[str, np.ndarray]:
+        """
+        Join samples onto frame intervals
+        Args:
+            start_times: perf_counter timestamps when each frame started
+            end_times: perf_counter timestamps when each frame finished
+            min_window: Minimum window in seconds for CPU attribution; process CPU
+                times advance in scheduler ticks (10 ms on Linux), so shorter
+                windows quantize to 0% or several hundred percent
+        Returns:
+            Per-frame cpu_percent, ram_mb, gpu_util and gpu_memory_mb arrays
+        """
+        s = self.samples()
+        n_frames = len(start_times)
+        if len(s['time']) < 2:
+            zeros = np.zeros(n_frames)
+            return {'cpu_percent': zeros, 'ram_mb': zeros.copy(),
+                    'gpu_util': zeros.copy(), 'gpu_memory_mb': zeros.copy()}
+
+        last = len(s['time']) - 1
+        # Gauges (RSS, GPU) take the first sample at or after the frame end
+        i_end = np.clip(np.searchsorted(s['time'], end_times, side='left'), 0, last)
+
+        # CPU is a rate: widen short frames symmetrically around their midpoint, then
+        # difference the last sample at or before the start and the first at or after the end
+        mid = (start_times + end_times) / 2
+        half = np.maximum((end_times - start_times) / 2, min_window / 2)
+        i0 = np.clip(np.searchsorted(s['time'], mid - half, side='right') - 1, 0, last - 1)
+        i1 = np.clip(np.searchsorted(s['time'], mid + half, side='left'), 1, last)
+        i1 = np.maximum(i1, i0 + 1)
+
+        dt = s['time'][i1] - s['time'][i0]
+        cpu_percent = (s['cpu_seconds'][i1] - s['cpu_seconds'][i0]) / dt * 100
+
+        return {
+            'cpu_percent': cpu_percent,
+            'ram_mb': s['ram_mb'][i_end],
+            'gpu_util': s['gpu_util'][i_end],
+            'gpu_memory_mb': s['gpu_memory_mb'][i_end]
+        }
@@ -0,0 +1,433 @@
+"""
+Benchmark results history and regression gate
+Every recorded run is appended to a local SQLite table keyed by git commit, OpenCV
+version, CPU model and configuration; `compare` diffs a run against a named baseline
+per tracker and sequence and exits non-zero when FPS, p99 latency or AUC regress
+beyond the tolerances
+"""
+import argparse
+import hashlib
+import json
+import platform
+import subprocess
+import sqlite3
+import sys
+import time
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_DB = ROOT_DIR / 'results' / 'history.sqlite'
+
+# hardware_benchmark_full.json field -> history metric
+HARDWARE_METRICS = {
+    'avg_fps': 'fps',
+    'avg_latency_ms': 'avg_latency_ms',
+    'p95_latency_ms': 'p95_latency_ms',
+    'p99_latency_ms': 'p99_latency_ms',
+    'latency_variance': 'latency_variance',
+    'avg_cpu_percent': 'avg_cpu_percent',
+    'max_ram_mb': 'max_ram_mb',
+    'model_updates': 'model_updates',
+    'refreshes': 'refreshes'
+}
+ACCURACY_METRICS = ('auc', 'success50', 'precision20', 'norm_precision20', 'fps')
+
+# Gated metric -> (direction, tolerance kind); relative tolerances are in percent
+GATES = {
+    'fps': ('higher', 'relative'),
+    'p99_latency_ms': ('lower', 'relative'),
+    'auc': ('higher', 'absolute')
+}
+DEFAULT_TOLERANCES = {'fps': 5.0, 'p99_latency_ms': 10.0, 'auc': 0.01}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TEXT NOT NULL,
+    label TEXT,
+    source TEXT NOT NULL,
+    git_commit TEXT,
+    git_dirty INTEGER,
+    opencv_version TEXT,
+    cpu_model TEXT,
+    config_hash TEXT,
+    config TEXT,
+    environment TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    tracker TEXT NOT NULL,
+    sequence TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, tracker, sequence, metric)
+);
+CREATE INDEX IF NOT EXISTS runs_label ON runs(label);
+CREATE INDEX IF NOT EXISTS runs_key ON runs(git_commit, opencv_version, cpu_model, config_hash);
+'''
+
+# History rows are never rewritten: a baseline stays what it was when recorded
+APPEND_ONLY = '''
+CREATE TRIGGER IF NOT EXISTS {table}_no_{op} BEFORE {op} ON {table}
+BEGIN SELECT RAISE(ABORT, 'results history is append-only'); END;
+'''
+
+
+def _git(*args) -> Optional[str]:
+    try:
+        out = subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True,
+                             timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def _package_version(*names) -> Optional[str]:
+    for name in names:
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            continue
+    return None
+
+
+def cpu_model() -> str:
+    """CPU model name from /proc/cpuinfo, falling back to platform.processor()"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def environment() -> Dict:
+    """Identity of the code, libraries and machine a run was measured on"""
+    try:
+        import cv2
+        opencv = cv2.__version__
+    except ImportError:
+        opencv = None
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'git_commit': _git('rev-parse', 'HEAD'),
+        'git_dirty': bool(status) if status is not None else None,
+        'opencv_version': opencv,
+        'cpu_model': cpu_model(),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        # Read from package metadata so recording never imports torch
+        'torch': _package_version('torch'),
+        'numpy': _package_version('numpy')
+    }
+
+
+def config_hash(config: Dict) -> str:
+    raw = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+class ResultsHistory:
+    """Append-only store of benchmark metrics, one row per (run, tracker, sequence, metric)"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        for table in ('runs', 'metrics'):
+            for op in ('UPDATE', 'DELETE'):
+                self.conn.executescript(APPEND_ONLY.format(table=table, op=op))
+
+    def record(self, source: str, rows: Iterable[Tuple[str, str, str, float]],
+               config: Dict = None, label: str = None, env: Dict = None) -> int:
+        """
+        Append one run
+        Args:
+            source: 'hardware', 'accuracy' or 'rigorous'
+            rows: (tracker, sequence, metric, value) tuples
+            config: Effective configuration (tracker parameters, frame source, ...)
+            label: Name to compare against later, e.g. 'opencv-4.9' or 'release'
+            env: Environment; measured now by default
+        Returns:
+            run_id
+        """
+        env = env or environment()
+        config = config or {}
+        with self.conn:
+            cur = self.conn.execute(
+                'INSERT INTO runs (recorded_at, label, source, git_commit, git_dirty, '
+                'opencv_version, cpu_model, config_hash, config, environment) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.strftime('%Y-%m-%dT%H:%M:%S'), label, source, env.get('git_commit'),
+                 env.get('git_dirty'), env.get('opencv_version'), env.get('cpu_model'),
+                 config_hash(config), json.dumps(config, sort_keys=True, default=str),
+                 json.dumps(env, sort_keys=True)))
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                'INSERT INTO metrics (run_id, tracker, sequence, metric, value) VALUES (?, ?, ?, ?, ?)',
+                [(run_id, tracker, sequence, metric, float(value))
+                 for tracker, sequence, metric, value in rows])
+        return run_id
+
+    def record_hardware(self, results: Dict, label: str = None) -> int:
+        """Record benchmark_hardware results (tracker name -> result dict)"""
+        rows, config = [], {}
+        for tracker, result in results.items():
+            # The frame partition path carries the video name: .../video=<name>/run=<id>
+            sequence = Path(result.get('frame_partition', 'video=unknown/run')).parent.name
+            sequence = sequence.split('=', 1)[-1]
+            rows += [(tracker, sequence, metric, result[key])
+                     for key, metric in HARDWARE_METRICS.items() if key in result]
+            config[tracker] = {'frame_source': result.get('frame_source'),
+                               'warmup_frames': result.get('warmup_frames', 0),
+                               'params': result.get('tracker_params', {})}
+        return self.record('hardware', rows, config, label)
+
+    def record_accuracy(self, table: pd.DataFrame, tracker: str, config: Dict = None,
+                        label: str = None) -> int:
+        """Record an evaluate_dataset table; each variant is stored as '<tracker>/<variant>'"""
+        rows = []
+        for column in table.columns:
+            metric, _, variant = column.rpartition('_')
+            if metric not in ACCURACY_METRICS or not variant:
+                continue
+            for sequence, value in zip(table['sequence'], table[column]):
+                rows.append((f'{tracker}/{variant}', str(sequence), metric, value))
+        return self.record('accuracy', rows, config, label)
+
+    def record_rigorous(self, summary: pd.DataFrame, label: str = None) -> int:
+        """Record the bootstrap estimates of a rigorous_benchmark summary"""
+        rows = [(r.tracker, r.video, r.statistic, r.estimate) for r in summary.itertuples()]
+        return self.record('rigorous', rows, {}, label)
+
+    def runs(self, label: str = None) -> pd.DataFrame:
+        query = ('SELECT run_id, recorded_at, label, source, git_commit, git_dirty, '
+                 'opencv_version, cpu_model, config_hash FROM runs')
+        params = ()
+        if label is not None:
+            query += ' WHERE label = ?'
+            params = (label,)
+        return pd.read_sql_query(query + ' ORDER BY run_id', self.conn, params=params)
+
+    def metrics(self, run_id: int) -> pd.DataFrame:
+        return pd.read_sql_query('SELECT tracker, sequence, metric, value FROM metrics '
+                                 'WHERE run_id = ?', self.conn, params=(run_id,))
+
+    def resolve(self, ref: str) -> Dict[str, int]:
+        """
+        Runs referred to by a run id, a label or 'latest'
+        Returns:
+            source -> run_id (the latest run of each source for labels and 'latest')
+        """
+        if ref.isdigit():
+            row = self.conn.execute('SELECT source, run_id FROM runs WHERE run_id = ?',
+                                    (int(ref),)).fetchone()
+            return {row[0]: row[1]} if row else {}
+        query = 'SELECT source, MAX(run_id) FROM runs'
+        params = ()
+        if ref != 'latest':
+            query += ' WHERE label = ?'
+            params = (ref,)
+        return dict(self.conn.execute(query + ' GROUP BY source', params).fetchall())
+
+    def environment_of(self, run_id: int) -> Dict:
+        row = self.conn.execute('SELECT environment FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def config_of(self, run_id: int) -> Tuple[Optional[str], Dict]:
+        """Configuration hash and configuration of a run"""
+        row = self.conn.execute('SELECT config_hash, config FROM runs WHERE run_id = ?',
+                                (run_id,)).fetchone()
+        if not row:
+            return None, {}
+        return row[0], json.loads(row[1]) if row[1] else {}
+
+    def close(self):
+        self.conn.close()
+
+
+def compare_runs(current: pd.DataFrame, baseline: pd.DataFrame,
+                 tolerances: Dict[str, float] = None) -> pd.DataFrame:
+    """
+    Per tracker, sequence and gated metric: change from baseline and pass/fail
+    Args:
+        current, baseline: ResultsHistory.metrics() tables
+        tolerances: Metric -> allowed regression (percent for fps/p99, absolute for auc)
+    Returns:
+        Rows with baseline, current, change and status ('ok', 'improved', 'REGRESSION');
+        a baseline row missing from the current run or a NaN value is a regression
+    """
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    keys = ['tracker', 'sequence', 'metric']
+    merged = baseline.merge(current, on=keys, how='left', suffixes=('_baseline', '_current'))
+    merged = merged[merged['metric'].isin(list(GATES))]
+
+    rows = []
+    for r in merged.itertuples():
+        direction, kind = GATES[r.metric]
+        base, cur = r.value_baseline, r.value_current
+        tolerance = tolerances[r.metric]
+        if pd.isna(base) or pd.isna(cur):
+            # A metric that disappeared or stopped being computed cannot pass the gate
+            rows.append({'tracker': r.tracker, 'sequence': r.sequence, 'metric': r.metric,
+                         'baseline': base, 'current': cur, 'change': float('nan'),
+                         'change_unit': '%' if kind == 'relative' else 'abs',
+                         'tolerance': tolerance, 'status': 'REGRESSION'})
+            continue
+        if kind == 'relative':
+            change = 100.0 * (cur - base) / base if base else 0.0
+        else:
+            change = cur - base
+        # Positive loss means worse, whichever way the metric points
+        loss = -change if direction == 'higher' else change
+        status = 'REGRESSION' if loss > tolerance else 'improved' if loss < -tolerance else 'ok'
+        rows.append({'tracker': r.tracker, 'sequence': r.sequence, 'metric': r.metric,
+                     'baseline': base, 'current': cur,
+                     'change': change, 'change_unit': '%' if kind == 'relative' else 'abs',
+                     'tolerance': tolerance, 'status': status})
+    return pd.DataFrame(rows, columns=['tracker', 'sequence', 'metric', 'baseline', 'current',
+                                       'change', 'change_unit', 'tolerance', 'status'])
+
+
+def record_file(history: ResultsHistory, path: Path, label: str = None,
+                tracker: str = None) -> int:
+    """Record a results file, detecting its kind from its contents"""
+    if path.suffix == '.json':
+        with open(path) as f:
+            return history.record_hardware(json.load(f), label)
+    table = pd.read_csv(path)
+    if 'statistic' in table.columns:
+        return history.record_rigorous(table, label)
+    if 'sequence' in table.columns:
+        config = {}
+        params_path = path.with_suffix('.params.json')
+        if params_path.exists():
+            with open(params_path) as f:
+                config = json.load(f)
+        tracker = tracker or config.get('tracker')
+        if not tracker:
+            raise ValueError(f'{path}: no tracker name, pass --tracker')
+        return history.record_accuracy(table, tracker, config, label)
+    raise ValueError(f'{path}: not a benchmark_hardware, evaluate_dataset or rigorous_benchmark result')
+
+
+def _compare(history: ResultsHistory, args) -> int:
+    baseline_runs = history.resolve(args.baseline)
+    current_runs = history.resolve(args.current)
+    if not baseline_runs:
+        print(f"No runs found for baseline '{args.baseline}'")
+        return 2
+    sources = sorted(set(baseline_runs) & set(current_runs))
+    if not sources:
+        print(f"No runs of the baseline's sources ({', '.join(sorted(baseline_runs))}) "
+              f"found for '{args.current}'")
+        return 2
+
+    tolerances = {'fps': args.fps_tolerance, 'p99_latency_ms': args.p99_tolerance,
+                  'auc': args.auc_tolerance}
+    tables = []
+    config_changed = []
+    for source in sources:
+        base_id, cur_id = baseline_runs[source], current_runs[source]
+        if base_id == cur_id:
+            print(f'\n{source}: no run newer than baseline run {base_id}, skipped')
+            continue
+        base_env, cur_env = history.environment_of(base_id), history.environment_of(cur_id)
+        print(f'\n{source}: run {cur_id} vs baseline run {base_id}')
+        for key in ('git_commit', 'opencv_version', 'cpu_model', 'torch'):
+            if base_env.get(key) != cur_env.get(key):
+                print(f'  {key}: {base_env.get(key)} -> {cur_env.get(key)}')
+        base_hash, base_config = history.config_of(base_id)
+        cur_hash, cur_config = history.config_of(cur_id)
+        if base_hash != cur_hash:
+            changed = sorted(k for k in set(base_config) | set(cur_config)
+                             if base_config.get(k) != cur_config.get(k))
+            print(f"  config_hash: {base_hash} -> {cur_hash} (changed: {', '.join(changed)})")
+            config_changed.append(source)
+        current, baseline = history.metrics(cur_id), history.metrics(base_id)
+        missing = baseline.merge(current, on=['tracker', 'sequence'], how='left', indicator=True)
+        missing = missing[missing['_merge'] == 'left_only'][['tracker', 'sequence']].drop_duplicates()
+        for r in missing.itertuples():
+            print(f'  missing from current run: {r.tracker} / {r.sequence}')
+        table = compare_runs(current, baseline, tolerances)
+        table.insert(0, 'source', source)
+        tables.append(table)
+
+    if not tables:
+        return 2
+    result = pd.concat(tables, ignore_index=True)
+    pd.set_option('display.width', 200)
+    print()
+    print(result.to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f'\nComparison saved to: {args.out}')
+
+    regressions = result[result['status'] == 'REGRESSION']
+    if len(regressions):
+        print(f'\nFAIL: {len(regressions)} regression(s) beyond tolerance or missing')
+        return 1
+    if config_changed and not args.allow_config_change:
+        print(f"\nFAIL: configuration differs from the baseline ({', '.join(config_changed)}); "
+              f"pass --allow-config-change to accept")
+        return 1
+    print('\nPASS: no regression beyond tolerance')
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark results history and regression gate')
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help='History database')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='Append result files to the history')
+    record.add_argument('files', nargs='+', type=Path,
+                        help='hardware_benchmark_full.json, an evaluate_dataset CSV '
+                             'or rigorous_summary.csv')
+    record.add_argument('--label', default=None, help='Name for later comparisons')
+    record.add_argument('--tracker', default=None,
+                        help='Tracker of an evaluate_dataset CSV without a .params.json')
+
+    runs = commands.add_parser('runs', help='List recorded runs')
+    runs.add_argument('--label', default=None)
+
+    compare = commands.add_parser('compare', help='Diff a run against a baseline; exit 1 on regression')
+    compare.add_argument('--baseline', required=True, help='Baseline label or run id')
+    compare.add_argument('--current', default='latest',
+                         help="Current label or run id (default: latest run of each source)")
+    compare.add_argument('--fps-tolerance', type=float, default=DEFAULT_TOLERANCES['fps'],
+                         help='Allowed FPS drop in percent')
+    compare.add_argument('--p99-tolerance', type=float, default=DEFAULT_TOLERANCES['p99_latency_ms'],
+                         help='Allowed p99 latency increase in percent')
+    compare.add_argument('--auc-tolerance', type=float, default=DEFAULT_TOLERANCES['auc'],
+                         help='Allowed absolute AUC drop')
+    compare.add_argument('--allow-config-change', action='store_true',
+                         help='Pass even when the configuration hash differs from the baseline')
+    compare.add_argument('--out', type=Path, default=None, help='Write the comparison CSV')
+    args = parser.parse_args()
+
+    history = ResultsHistory(args.db)
+    try:
+        if args.command == 'record':
+            for path in args.files:
+                run_id = record_file(history, path, args.label, args.tracker)
+                print(f'Recorded {path} as run {run_id}')
+            return 0
+        if args.command == 'runs':
+            print(history.runs(args.label).to_string(index=False))
+            return 0
+        return _compare(history, args)
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Repeated-measures tracker benchmark with confidence intervals
+Runs every tracker x video R times in randomized interleaved order after a warm-up
+window, then reports hierarchical bootstrap confidence intervals for mean FPS,
+p95/p99 latency and latency variance and flags comparisons whose intervals overlap
+"""
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'trackers'))
+
+from registry import parse_names
+from benchmark_hardware import HardwareBenchmark
+from frame_store import read_partition
+
+# Statistic name -> function of one pooled latency sample (ms)
+STATISTICS: Dict[str, Callable[[np.ndarray], float]] = {
+    'fps': lambda x: 1000.0 / x.mean(),
+    'p95_latency_ms': lambda x: float(np.percentile(x, 95)),
+    'p99_latency_ms': lambda x: float(np.percentile(x, 99)),
+    'latency_variance': lambda x: float(x.var())
+}
+
+# Higher is better only for throughput
+HIGHER_IS_BETTER = {'fps'}
+
+
+def schedule(trackers: Sequence[str], videos: Sequence[str], repetitions: int,
+             rng: np.random.Generator) -> List[Tuple[int, str, str]]:
+    """
+    Randomized interleaved run order
+    Every repetition runs each tracker x video once in a fresh random order, so slow
+    drift (thermals, background load) spreads over all trackers instead of one
+    Returns:
+        (repetition, tracker, video) in execution order
+    """
+    order = []
+    block = list(itertools.product(trackers, videos))
+    for rep in range(repetitions):
+        order.extend((rep, *block[i]) for i in rng.permutation(len(block)))
+    return order
+
+
+def hierarchical_bootstrap(runs: Sequence[np.ndarray], n_boot: int = 2000,
+                           confidence: float = 0.95,
+                           rng: np.random.Generator = None) -> Dict[str, Dict[str, float]]:
+    """
+    Bootstrap confidence intervals over repeated runs
+    Each replicate resamples runs with replacement, then frames with replacement within
+    each drawn run, so both run-to-run and frame-to-frame variation widen the interval
+    Args:
+        runs: Per-frame latencies (ms) of each repetition
+        n_boot: Bootstrap replicates
+        confidence: Two-sided interval coverage
+    Returns:
+        Statistic name -> estimate (all runs pooled), ci_low, ci_high
+    """
+    rng = rng or np.random.default_rng()
+    runs = [np.asarray(r, dtype=np.float64) for r in runs if len(r)]
+    if not runs:
+        return {}
+    pooled = np.concatenate(runs)
+    sizes = np.array([len(r) for r in runs])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    replicates = {name: np.empty(n_boot) for name in STATISTICS}
+    for b in range(n_boot):
+        picked = rng.integers(0, len(runs), len(runs))
+        n = sizes[picked]
+        # One frame index per resampled frame, drawn uniformly inside its run
+        start = np.repeat(offsets[picked], n)
+        idx = start + (rng.random(n.sum()) * np.repeat(n, n)).astype(np.int64)
+        sample = pooled[idx]
+        for name, fn in STATISTICS.items():
+            replicates[name][b] = fn(sample)
+
+    alpha = (1 - confidence) / 2
+    return {
+        name: {
+            'estimate': fn(pooled),
+            'ci_low': float(np.quantile(replicates[name], alpha)),
+            'ci_high': float(np.quantile(replicates[name], 1 - alpha))
+        }
+        for name, fn in STATISTICS.items()
+    }
+
+
+def summarize(runs: Dict[Tuple[str, str], List[np.ndarray]], trackers: Sequence[str],
+              n_boot: int, confidence: float, rng: np.random.Generator) -> pd.DataFrame:
+    """One row per (tracker, video, statistic); video 'ALL' pools every video's runs"""
+    groups = dict(runs)
+    for tracker in trackers:
+        groups[(tracker, 'ALL')] = [r for (t, _), rs in runs.items() if t == tracker for r in rs]
+
+    # Rows follow the requested tracker order, so comparisons read as (a, b) in that order
+    rows = []
+    for tracker, video in sorted(groups, key=lambda k: (k[1] == 'ALL', k[1], trackers.index(k[0]))):
+        latencies = groups[(tracker, video)]
+        per_run_fps = [STATISTICS['fps'](r) for r in latencies if len(r)]
+        for name, ci in hierarchical_bootstrap(latencies, n_boot, confidence, rng).items():
+            rows.append({
+                'tracker': tracker,
+                'video': video,
+                'statistic': name,
+                'runs': len(per_run_fps),
+                'frames': int(sum(len(r) for r in latencies)),
+                'between_run_fps_cv': np.std(per_run_fps) / np.mean(per_run_fps)
+                                      if per_run_fps else np.nan,
+                **ci
+            })
+    return pd.DataFrame(rows)
+
+
+def compare(summary: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pairwise tracker comparisons per video and statistic
+    A difference is only 'resolved' when the two confidence intervals do not overlap
+    """
+    rows = []
+    for (video, statistic), group in summary.groupby(['video', 'statistic'], sort=False):
+        for (_, a), (_, b) in itertools.combinations(group.iterrows(), 2):
+            overlap = a['ci_low'] <= b['ci_high'] and b['ci_low'] <= a['ci_high']
+            better = a if (a['estimate'] > b['estimate']) == (statistic in HIGHER_IS_BETTER) else b
+            rows.append({
+                'video': video,
+                'statistic': statistic,
+                'tracker_a': a['tracker'],
+                'tracker_b': b['tracker'],
+                'estimate_a': a['estimate'],
+                'estimate_b': b['estimate'],
+                'diff_percent': 100.0 * (b['estimate'] - a['estimate']) / a['estimate']
+                                if a['estimate'] else np.nan,
+                'ci_overlap': overlap,
+                'better': better['tracker'] if not overlap else ''
+            })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Repeated, randomized tracker benchmark with bootstrap confidence intervals')
+    parser.add_argument('--videos', nargs='+', default=['../test_videos/test.mp4'],
+                        help='Videos to benchmark on')
+    parser.add_argument('--trackers', type=str, default='CSRT,CSRT-ROI,CSRT-async',
+                        help='Comma-separated tracker names')
+    parser.add_argument('--frames', type=int, default=300,
+                        help='Timed frames per run')
+    parser.add_argument('--warmup', type=int, default=30,
+                        help='Frames tracked after init and discarded before timing')
+    parser.add_argument('--repetitions', type=int, default=5,
+                        help='Runs per tracker x video')
+    parser.add_argument('--bootstrap', type=int, default=2000,
+                        help='Bootstrap replicates')
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Confidence level of the intervals')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed for the run order and the bootstrap')
+    parser.add_argument('--cooldown', type=float, default=0.0,
+                        help='Seconds to sleep between runs (interleaving already spreads drift)')
+    parser.add_argument('--source', choices=['cache', 'live', 'shm'], default='cache',
+                        help='Frame source, as in benchmark_hardware.py')
+    parser.add_argument('--stage-timing', action='store_true',
+                        help='Enable per-stage spans (off: time the uninstrumented path)')
+    parser.add_argument('--sample-rate', type=float, default=200.0,
+                        help='Hardware sampling rate in Hz')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='Directory for decoded frame caches')
+    parser.add_argument('--output', type=str, default='../results/rigorous',
+                        help='Output directory')
+    args = parser.parse_args()
+
+    missing = [v for v in args.videos if not Path(v).exists()]
+    if missing:
+        parser.error(f'videos not found: {missing}')
+    try:
+        tracker_names = parse_names(args.trackers)
+    except KeyError as e:
+        parser.error(str(e))
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(args.seed)
+    run_base = time.strftime('%Y%m%d-%H%M%S')
+
+    benchmark = HardwareBenchmark(args.videos[0], str(output), args.cache_dir,
+                                  tracker_names=tracker_names, sample_rate_hz=args.sample_rate,
+                                  frame_source=args.source, frame_csv=False,
+                                  stage_timing=args.stage_timing)
+
+    order = schedule(tracker_names, args.videos, args.repetitions, rng)
+    runs = {}
+    run_rows = []
+    for i, (rep, tracker_name, video) in enumerate(order):
+        print(f'\n[{i + 1}/{len(order)}] repetition {rep + 1}: {tracker_name} on {video}')
+        benchmark.set_video(video)
+        benchmark.run_id = f'{run_base}-r{rep:02d}'
+        result = benchmark.benchmark_tracker(tracker_name, args.frames, args.warmup)
+        if not result:
+            continue
+        latency = read_partition(result['frame_partition'], ['latency_ms']).get('latency_ms', np.empty(0))
+        runs.setdefault((tracker_name, Path(video).stem), []).append(latency)
+        run_rows.append({
+            'order': i,
+            'repetition': rep,
+            'tracker': tracker_name,
+            'video': Path(video).stem,
+            'run_id': benchmark.run_id,
+            'frames': len(latency),
+            **{name: fn(latency) if len(latency) else np.nan for name, fn in STATISTICS.items()}
+        })
+        if args.cooldown > 0:
+            time.sleep(args.cooldown)
+
+    pd.DataFrame(run_rows).to_csv(output / 'rigorous_runs.csv', index=False)
+    summary = summarize(runs, tracker_names, args.bootstrap, args.confidence, rng)
+    summary.to_csv(output / 'rigorous_summary.csv', index=False)
+    comparisons = compare(summary)
+    comparisons.to_csv(output / 'rigorous_comparisons.csv', index=False)
+
+    pd.set_option('display.width', 200)
+    print(f"\n{'='*60}")
+    print(f'{args.repetitions} repetitions, {args.warmup} warm-up frames, '
+          f'{args.confidence:.0%} bootstrap intervals')
+    print(f"{'='*60}")
+    print(summary[['tracker', 'video', 'statistic', 'estimate', 'ci_low', 'ci_high',
+                   'between_run_fps_cv']].to_string(index=False))
+    if len(comparisons):
+        unresolved = comparisons[comparisons['ci_overlap']]
+        print(f'\n{len(unresolved)}/{len(comparisons)} comparisons have overlapping intervals '
+              f'(difference not resolved):')
+        print(unresolved[['video', 'statistic', 'tracker_a', 'tracker_b',
+                          'diff_percent']].to_string(index=False))
+    print(f'\nResults saved to: {output}')
+
+
+if __name__ == '__main__':
+    main()
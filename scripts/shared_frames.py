@@ -0,0 +1,395 @@
+"""
+Shared-memory frame transport
+A decoder process writes frames into a ring of preallocated slots in
+multiprocessing.shared_memory; readers in any process get NumPy views of the slots,
+so frames are never pickled or copied between processes
+"""
+import cv2
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import psutil
+
+# Header fields (int64), followed by one cursor and one next sequence number per reader
+# and one sequence number per slot
+WRITE_SEQ, ENDED, STOP, DECODED, DROPPED, DROP_MODE, DECODER_PID = range(7)
+_FIELDS = 7
+# Cursor of a reader that left: never equal to or below a slot the writer wants
+_DETACHED = np.iinfo(np.int64).max
+_ALIGN = 64
+
+
+class FrameRing:
+    """
+    Ring of frame slots in one shared memory block
+    Frame n lives in slot n % slots. Each reader publishes a cursor: the sequence
+    number it is reading or holding, and the next sequence number it expects, which
+    only advances when a frame is returned. The writer never overwrites a slot a reader's
+    cursor still points into; slot sequence numbers are set to -1 while a slot is
+    being written so a reader can detect and skip a slot that was reused under it.
+    Header fields are plain int64 stores, there are no locks or fences. In lossless mode
+    that is enough: cursors only move forward, so a stale cursor load can only make the
+    writer wait longer. In drop mode the writer's check of the cursors can race with a
+    reader moving onto the slot, so readers copy the frame out and re-check the slot
+    sequence number afterwards (a seqlock), retrying on a mismatch.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], slots: int = 8, readers: int = 1,
+                 name: Optional[str] = None):
+        """
+        Args:
+            shape: Frame shape, e.g. (480, 640, 3); frames are uint8
+            slots: Number of preallocated frame slots (at least 2)
+            readers: Number of reader cursors; in lossless mode every reader must consume
+            name: Attach to an existing ring instead of creating one
+        """
+        if slots < 2:
+            raise ValueError('FrameRing needs at least 2 slots')
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.readers = readers
+        self.owner = name is None
+
+        ints = _FIELDS + 2 * readers + slots
+        self._times_offset = ints * 8
+        frames_offset = self._times_offset + slots * 8
+        frames_offset = (frames_offset + _ALIGN - 1) // _ALIGN * _ALIGN
+        frame_bytes = int(np.prod(self.shape))
+        size = frames_offset + slots * frame_bytes
+
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        self.header = np.ndarray((ints,), dtype=np.int64, buffer=buf)
+        self.cursors = self.header[_FIELDS:_FIELDS + readers]
+        self.next_seq = self.header[_FIELDS + readers:_FIELDS + 2 * readers]
+        self.slot_seq = self.header[_FIELDS + 2 * readers:]
+        self.capture_times = np.ndarray((slots,), dtype=np.float64, buffer=buf,
+                                        offset=self._times_offset)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buf,
+                                 offset=frames_offset)
+        if self.owner:
+            self.header[:] = 0
+            self.slot_seq[:] = -1
+        # Frames each reader skipped over, counted in the reading process
+        self.skipped = [0] * readers
+        # Drop mode copies frames out of the ring; one reusable buffer per reader
+        self._copies = {}
+
+    @property
+    def spec(self) -> Dict:
+        """Arguments for attaching to this ring from another process"""
+        return {'shape': self.shape, 'slots': self.slots, 'readers': self.readers, 'name': self.name}
+
+    # Writer side
+
+    def acquire(self, drop: bool = False, poll: float = 0.0005) -> Optional[np.ndarray]:
+        """
+        Claim the slot for the next frame
+        Args:
+            drop: Never wait for readers; return None if a reader still holds the slot
+            poll: Sleep between checks while waiting
+        Returns:
+            Writable view of the slot, or None (dropped, or stop requested)
+        """
+        if drop:
+            self.header[DROP_MODE] = 1
+        seq = int(self.header[WRITE_SEQ])
+        slot = seq % self.slots
+        previous = self.slot_seq[slot]
+        while True:
+            # Invalidate first, then check readers: a reader that moved onto the slot
+            # after this store sees -1 and skips it
+            self.slot_seq[slot] = -1
+            if not (self.cursors == seq - self.slots).any() and \
+                    (drop or self.cursors.min() > seq - self.slots):
+                return self.frames[slot]
+            self.slot_seq[slot] = previous
+            if drop or self.header[STOP]:
+                return None
+            time.sleep(poll)
+
+    def publish(self, captured: float):
+        """Make the frame written into the acquired slot visible to readers"""
+        seq = int(self.header[WRITE_SEQ])
+        slot = seq % self.slots
+        self.capture_times[slot] = captured
+        self.slot_seq[slot] = seq
+        self.header[WRITE_SEQ] = seq + 1
+
+    def finish(self):
+        """Signal end of stream"""
+        self.header[ENDED] = 1
+
+    # Reader side
+
+    def read(self, reader: int, timeout: Optional[float] = None, latest: bool = False,
+             poll: float = 0.0005) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Return the next frame for a reader
+        Lossless mode returns a view into the slot, valid until this reader's next read;
+        drop mode returns a copy in a buffer reused by this reader's next read.
+        Args:
+            reader: Reader index in [0, readers)
+            timeout: Seconds to wait for a frame (None blocks, 0 polls)
+            latest: Skip to the newest published frame instead of the next one
+            poll: Sleep between checks while waiting
+        Returns:
+            ret, frame, capture_time; ret is False at end of stream or on timeout
+        """
+        # The held frame is released by moving the cursor past it
+        seq = int(self.next_seq[reader])
+        self.cursors[reader] = seq
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            # ENDED is read first: once set, every frame is already published
+            ended = self.header[ENDED]
+            written = int(self.header[WRITE_SEQ])
+            if written > seq:
+                if latest and written - 1 > seq:
+                    self.skipped[reader] += written - 1 - seq
+                    seq = written - 1
+                    self.cursors[reader] = seq
+                slot = seq % self.slots
+                if self.slot_seq[slot] == seq:
+                    frame, captured = self.frames[slot], float(self.capture_times[slot])
+                    if self.header[DROP_MODE]:
+                        frame = self._copy(reader, frame)
+                    # Seqlock check: the writer invalidates a slot before rewriting it
+                    if self.slot_seq[slot] == seq:
+                        self.next_seq[reader] = seq + 1
+                        return True, frame, captured
+                # Overwritten before this reader got to it (drop mode): move on
+                self.skipped[reader] += 1
+                seq += 1
+                self.cursors[reader] = seq
+                continue
+            if ended:
+                return False, None, 0.0
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False, None, 0.0
+            time.sleep(poll)
+
+    def _copy(self, reader: int, frame: np.ndarray) -> np.ndarray:
+        buffer = self._copies.get(reader)
+        if buffer is None:
+            buffer = self._copies[reader] = np.empty_like(frame)
+        np.copyto(buffer, frame)
+        return buffer
+
+    def close(self):
+        """Detach; the owner also frees the block"""
+        try:
+            self.shm.close()
+        except BufferError:
+            # Frame views are still referenced; the mapping goes away with them
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+def _decode_worker(spec: Dict, source, drop: bool, realtime: bool, fps: float,
+                   max_frames: Optional[int]):
+    """Decoder process: decode straight into ring slots"""
+    ring = FrameRing(**spec)
+    # Readers in other processes check this to notice a crashed decoder
+    ring.header[DECODER_PID] = os.getpid()
+    cap = cv2.VideoCapture(source)
+    start = time.perf_counter()
+    decoded = 0
+    try:
+        while not ring.header[STOP]:
+            if max_frames is not None and decoded >= max_frames:
+                break
+            if realtime:
+                delay = start + decoded / fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            slot = ring.acquire(drop=drop)
+            if slot is None:
+                if ring.header[STOP]:
+                    break
+                # Every slot ahead is held by a reader: decode and discard
+                if not cap.grab():
+                    break
+                decoded += 1
+                ring.header[DROPPED] += 1
+                ring.header[DECODED] = decoded
+                continue
+
+            ret, frame = cap.read(slot)
+            if not ret:
+                break
+            if frame is not slot:
+                if frame.shape != slot.shape:
+                    print(f"Warning: frame size changed to {frame.shape}, stopping shared-memory decoder")
+                    break
+                np.copyto(slot, frame)
+            decoded += 1
+            # perf_counter is a system-wide monotonic clock, comparable across processes
+            ring.publish(time.perf_counter())
+            ring.header[DECODED] = decoded
+    finally:
+        ring.finish()
+        cap.release()
+        ring.close()
+
+
+class SharedFrameReader:
+    """
+    PrefetchReader-compatible reader fed by a decoder process through a FrameRing
+    One reader owns the ring and its decoder; with readers > 1, tracker processes
+    attach their own SharedFrameReader(source, attach=owner.spec, reader=i), so one
+    decoder feeds them all
+    """
+
+    def __init__(self, source, depth: int = 8, drop: bool = False,
+                 realtime: bool = False, fps: Optional[float] = None,
+                 max_frames: Optional[int] = None, readers: int = 1, reader: int = 0,
+                 attach: Optional[Dict] = None):
+        """
+        Args:
+            source: Video path or camera index passed to cv2.VideoCapture
+            depth: Number of ring slots (frames the decoder may run ahead)
+            drop: Readers always take the newest frame and the decoder never waits
+                (live camera) instead of lossless replay
+            realtime: Release frames at the source FPS instead of as fast as possible
+            fps: Override the pacing rate (default: container FPS, else 30)
+            max_frames: Stop after decoding this many frames
+            readers: Reader cursors in the ring; in lossless mode the decoder waits for
+                the slowest, so every reader must keep reading or release()
+            reader: Cursor this instance reads with
+            attach: spec of another SharedFrameReader's ring; this instance then only
+                reads, the owner starts and stops the decoder
+        """
+        self.source = source
+        self.drop = drop
+        self.realtime = realtime
+        self.max_frames = max_frames
+        self.reader = reader
+        self.attached = attach is not None
+        self.ring = None
+        self.ended = False
+        self._process = None
+        self._counts = (0, 0)
+
+        if self.attached:
+            self.ring = FrameRing(**attach)
+            self._opened = True
+            return
+
+        # Probe the frame size in this process so the ring can be allocated up front
+        cap = cv2.VideoCapture(source)
+        self._opened = cap.isOpened()
+        shape = None
+        if self._opened:
+            source_fps = cap.get(cv2.CAP_PROP_FPS)
+            self.fps = fps or (source_fps if source_fps and source_fps > 0 else 30.0)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if width > 0 and height > 0:
+                shape = (height, width, 3)
+            else:
+                ret, frame = cap.read()
+                shape = frame.shape if ret else None
+        cap.release()
+        self._opened = shape is not None
+        if self._opened:
+            self.ring = FrameRing(shape, slots=max(2, depth), readers=readers)
+
+    @property
+    def spec(self) -> Optional[Dict]:
+        return self.ring.spec if self.ring else None
+
+    @property
+    def decoded(self) -> int:
+        return int(self.ring.header[DECODED]) if self.ring else self._counts[0]
+
+    @property
+    def dropped(self) -> int:
+        """Frames decoded but never delivered: discarded by the decoder or skipped by this reader"""
+        if self.ring is None:
+            return self._counts[1]
+        return int(self.ring.header[DROPPED]) + self.ring.skipped[self.reader]
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def start(self):
+        """Start the decoder process (attached readers use the owner's)"""
+        if self.attached:
+            return self
+        ctx = mp.get_context('spawn')
+        self._process = ctx.Process(
+            target=_decode_worker,
+            args=(self.ring.spec, self.source, self.drop, self.realtime, self.fps, self.max_frames),
+            name='shm-decoder', daemon=True)
+        self._process.start()
+        return self
+
+    def read_timed(self, timeout: Optional[float] = None) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Return the next frame (valid until the next read: a view into shared memory,
+        or a reused copy in drop mode) and the perf_counter time it was decoded
+        """
+        if self._process is None and not self.attached:
+            self.start()
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            wait = 0.1 if deadline is None else max(0.0, min(0.1, deadline - time.perf_counter()))
+            ret, frame, captured = self.ring.read(self.reader, wait, latest=self.drop)
+            if ret:
+                return ret, frame, captured
+            # A decoder that crashed never sets ENDED
+            if self.ring.header[ENDED] or not self._decoder_alive():
+                self.ended = True
+                return False, None, 0.0
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False, None, 0.0
+
+    def _decoder_alive(self) -> bool:
+        if not self.attached:
+            return self._process.is_alive()
+        pid = int(self.ring.header[DECODER_PID])
+        # Not started yet, or still running
+        return pid == 0 or psutil.pid_exists(pid)
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Same contract as cv2.VideoCapture.read"""
+        ret, frame, _ = self.read_timed()
+        return ret, frame
+
+    def detach(self, reader: int):
+        """Stop waiting for a reader that will not read again (e.g. its process failed)"""
+        if self.ring is not None:
+            self.ring.cursors[reader] = _DETACHED
+
+    def release(self):
+        """Stop the decoder process and free the ring; attached readers only detach"""
+        if self.ring is None:
+            return
+        if self.attached:
+            # Stop holding back a lossless decoder that other readers still depend on
+            self.detach(self.reader)
+            self._counts = (self.decoded, self.dropped)
+            self.ring.close()
+            self.ring = None
+            return
+        self.ring.header[STOP] = 1
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        self._counts = (self.decoded, self.dropped)
+        self.ring.close()
+        self.ring = None
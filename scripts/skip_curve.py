@@ -0,0 +1,119 @@
+"""
+Accuracy vs skip rate for keyframe tracking
+Runs a tracker under fixed (every k-th frame) and adaptive (motion threshold)
+keyframe schedules on ground-truth sequences and reports AUC / Precision@20
+against the measured fraction of frames served by the motion predictor
+"""
+import argparse
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from evaluate_dataset import (
+    available,
+    checkpoint_path,
+    config_key,
+    find_sequences,
+    load_checkpoint,
+    pooled_metrics,
+    run_tasks,
+)
+
+
+def schedules(skips, thresholds, max_skip):
+    """KeyframeTracker arguments for every fixed and adaptive schedule"""
+    configs = [{"skip": k} for k in skips]
+    configs += [{"motion_threshold": t, "max_skip": max_skip} for t in thresholds]
+    return configs
+
+
+def _label(schedule):
+    if "motion_threshold" in schedule:
+        return f"adaptive-{schedule['motion_threshold']:g}"
+    return f"skip-{schedule['skip']}"
+
+
+def _plot(df, tracker_name, out_dir):
+    fig, axes = plt.subplots(1, 2, figsize=(10, 4), dpi=150)
+    for ax, (metric, label) in zip(axes, [("auc", "AUC"), ("precision20", "Precision@20")]):
+        for mode, marker in (("fixed", "o"), ("adaptive", "s")):
+            part = df[df["mode"] == mode].sort_values("skip_rate")
+            if len(part):
+                ax.plot(part["skip_rate"], part[metric], marker=marker, linewidth=1.5, label=mode)
+        ax.set_xlabel("Skip rate (fraction of predicted frames)")
+        ax.set_ylabel(label)
+        ax.set_title(f"{tracker_name}: {label} vs skip rate")
+        ax.grid(alpha=0.3)
+        ax.legend()
+
+    fig.tight_layout()
+    fig.savefig(out_dir / f"{tracker_name}_skip_curve.png")
+    plt.close(fig)
+
+
+def main():
+    root_dir = Path(__file__).resolve().parents[1]
+
+    parser = argparse.ArgumentParser(description="Measure tracking accuracy against keyframe skip rate.")
+    parser.add_argument("--dataset", type=Path, required=True)
+    parser.add_argument("--tracker", default="CSRT", choices=available())
+    parser.add_argument("--skips", type=int, nargs="+", default=[1, 2, 3, 4, 6, 8],
+                        help="Fixed schedules: run the tracker every k-th frame")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[0.05, 0.1, 0.2, 0.4],
+                        help="Adaptive schedules: motion thresholds in units of sqrt(w*h)")
+    parser.add_argument("--max-skip", type=int, default=8, help="Longest gap for adaptive schedules")
+    parser.add_argument("--sequences", nargs="*", help="Only evaluate these sequence names")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--checkpoint-dir", type=Path, default=None,
+                        help="Per-sequence box checkpoints (default: results/eval_checkpoints/<tracker>)")
+    parser.add_argument("--out", type=Path, default=root_dir / "plots")
+    args = parser.parse_args()
+
+    sequences = find_sequences(args.dataset)
+    if args.sequences:
+        sequences = [s for s in sequences if s["name"] in set(args.sequences)]
+    if not sequences:
+        raise SystemExit(f"No sequences found under {args.dataset}")
+    checkpoint_dir = args.checkpoint_dir or root_dir / "results" / "eval_checkpoints" / args.tracker
+
+    configs = schedules(args.skips, args.thresholds, args.max_skip)
+    tasks = []
+    keys = []
+    for schedule in configs:
+        kwargs = {"keyframe": schedule}
+        key = f"{_label(schedule)}-{config_key(args.tracker, kwargs)}"
+        keys.append(key)
+        for sequence in sequences:
+            path = checkpoint_path(checkpoint_dir, key, sequence["name"])
+            tasks.append((args.tracker, kwargs, sequence, path, key))
+
+    cached = run_tasks(tasks, args.workers)
+    print(f"{cached}/{len(tasks)} (schedule, sequence) cells served from cache")
+
+    rows = []
+    for schedule, key in zip(configs, keys):
+        results = {s["name"]: load_checkpoint(checkpoint_path(checkpoint_dir, key, s["name"]))
+                   for s in sequences}
+        updates = sum(len(s["groundtruth"]) - 1 for s in sequences)
+        keyframes = sum(results[s["name"]]["keyframes"] for s in sequences)
+        rows.append({
+            "schedule": _label(schedule),
+            "mode": "adaptive" if "motion_threshold" in schedule else "fixed",
+            "skip": schedule.get("skip"),
+            "motion_threshold": schedule.get("motion_threshold"),
+            "skip_rate": 1.0 - keyframes / updates if updates else 0.0,
+            **pooled_metrics(sequences, results)
+        })
+
+    df = pd.DataFrame(rows)
+    args.out.mkdir(parents=True, exist_ok=True)
+    csv_path = args.out / f"{args.tracker}_skip_curve.csv"
+    df.to_csv(csv_path, index=False, float_format="%.4f")
+    _plot(df, args.tracker, args.out)
+    print(f"Wrote {csv_path} and {args.out / f'{args.tracker}_skip_curve.png'}")
+    print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
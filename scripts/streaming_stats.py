@@ -0,0 +1,166 @@
+"""
+Streaming summary statistics
+Constant-memory running moments (Welford / Chan merge) and a DDSketch quantile
+sketch, so long benchmark runs can report mean, variance and tail latency live
+without keeping per-frame values in memory
+"""
+import math
+from typing import Dict
+
+import numpy as np
+
+
+class RunningMoments:
+    """Count, mean, variance, min, max and sum of a stream, mergeable across runs"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        """Add a batch of values (Chan et al. parallel update of a batch's moments)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        n = len(values)
+        if n == 0:
+            return
+        batch = RunningMoments()
+        batch.count = n
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.total = float(values.sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: 'RunningMoments'):
+        """Combine with moments of a disjoint stream"""
+        if other.count == 0:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.mean += delta * other.count / n
+        self.count = n
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Population variance, as np.var"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class DDSketch:
+    """
+    Quantile sketch with relative-error guarantees (Masson et al., VLDB 2019)
+    Positive values fall into logarithmic buckets of width gamma = (1+a)/(1-a), so any
+    quantile is returned within relative accuracy a. Values <= min_value share a zero
+    bucket; when more than max_buckets are in use the lowest buckets are collapsed.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048,
+                 min_value: float = 1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def update(self, values):
+        """Add a batch of values"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        positive = values[values > self.min_value]
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self._collapse()
+
+    def merge(self, other: 'DDSketch'):
+        """Combine with a sketch of another stream (same relative accuracy)"""
+        if other.gamma != self.gamma:
+            raise ValueError('Cannot merge sketches with different relative accuracy')
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self._collapse()
+
+    def _collapse(self):
+        if len(self.buckets) <= self.max_buckets:
+            return
+        keys = sorted(self.buckets)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        # Fold the lowest buckets into the lowest kept one; only small quantiles lose accuracy
+        total = sum(self.buckets.pop(k) for k in excess)
+        target = keys[len(excess)]
+        self.buckets[target] = self.buckets.get(target, 0) + total
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q in [0, 1]; nan for an empty sketch"""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class StreamingMetric:
+    """Running moments plus, optionally, a quantile sketch for one per-frame metric"""
+
+    def __init__(self, quantiles: bool = False, relative_accuracy: float = 0.01):
+        self.moments = RunningMoments()
+        self.sketch = DDSketch(relative_accuracy) if quantiles else None
+
+    def update(self, values):
+        self.moments.update(values)
+        if self.sketch is not None:
+            self.sketch.update(values)
+
+    def merge(self, other: 'StreamingMetric'):
+        self.moments.merge(other.moments)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    def quantile(self, q: float) -> float:
+        return self.sketch.quantile(q) if self.sketch is not None else math.nan
+
+    def summary(self) -> Dict[str, float]:
+        m = self.moments
+        summary = {
+            'count': m.count,
+            'mean': m.mean if m.count else 0.0,
+            'std': m.std,
+            'variance': m.variance,
+            'min': m.min if m.count else 0.0,
+            'max': m.max if m.count else 0.0,
+            'sum': m.total
+        }
+        if self.sketch is not None:
+            summary.update({'p50': self.quantile(0.50), 'p95': self.quantile(0.95),
+                            'p99': self.quantile(0.99)})
+        return summary
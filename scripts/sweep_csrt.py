@@ -0,0 +1,149 @@
+"""
+CSRT parameter sweep with a Pareto-front report
+Evaluates a grid or random sample of cv2.TrackerCSRT_Params configurations on
+ground-truth sequences in parallel and reports the FPS vs AUC / Precision@20 frontier
+"""
+import argparse
+import itertools
+import json
+import random
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from evaluate_dataset import (
+    checkpoint_path,
+    config_key,
+    find_sequences,
+    load_checkpoint,
+    pooled_metrics,
+    run_tasks,
+)
+
+DEFAULT_SPACE = {
+    "template_size": [100, 150, 200],
+    "number_of_scales": [17, 33],
+    "admm_iterations": [2, 4],
+    "use_segmentation": [True, False],
+    "use_color_names": [True, False],
+}
+
+
+def load_space(path):
+    """Load a {param: [values]} search space from YAML or JSON"""
+    path = Path(path)
+    with open(path) as f:
+        if path.suffix.lower() in (".yaml", ".yml"):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def expand_space(space, mode="grid", samples=20, seed=0):
+    """List configurations: the full grid, or `samples` distinct random grid points"""
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    if mode == "random" and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return grid
+
+
+def pareto_mask(throughput, quality):
+    """True for points not dominated in (throughput, quality), both maximized"""
+    throughput = np.asarray(throughput)
+    quality = np.asarray(quality)
+    # Sweep by descending throughput; a point is on the front if it beats every faster point
+    order = np.lexsort((-quality, -throughput))
+    best = np.maximum.accumulate(quality[order])
+    on_front = np.empty(len(order), dtype=bool)
+    on_front[0] = True
+    on_front[1:] = quality[order][1:] > best[:-1]
+    mask = np.zeros(len(order), dtype=bool)
+    mask[order] = on_front
+    return mask
+
+
+def _plot_front(df, out_dir):
+    fig, axes = plt.subplots(1, 2, figsize=(10, 4), dpi=150)
+    for ax, (metric, label) in zip(axes, [("auc", "AUC"), ("precision20", "Precision@20")]):
+        front = df[df[f"pareto_{metric}"]].sort_values("fps")
+        ax.scatter(df["fps"], df[metric], s=20, alpha=0.5, edgecolors="none", label="configs")
+        ax.plot(front["fps"], front[metric], color="#c44e52", marker="o", linewidth=1.5,
+                label="Pareto front")
+        ax.set_xlabel("FPS")
+        ax.set_ylabel(label)
+        ax.set_title(f"FPS vs {label}")
+        ax.grid(alpha=0.3)
+        ax.legend()
+
+    fig.tight_layout()
+    fig.savefig(out_dir / "csrt_sweep_pareto.png")
+    plt.close(fig)
+
+
+def main():
+    root_dir = Path(__file__).resolve().parents[1]
+
+    parser = argparse.ArgumentParser(description="Sweep CSRT parameters and report the Pareto front.")
+    parser.add_argument("--dataset", type=Path, required=True)
+    parser.add_argument("--space", type=Path, default=None,
+                        help="YAML/JSON {param: [values]} search space (default: built-in grid)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=20, help="Configurations for --mode random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sequences", nargs="*", help="Only evaluate these sequence names")
+    parser.add_argument("--max-sequences", type=int, default=None,
+                        help="Use the first N sequences as the evaluation subset")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cache-dir", type=Path, default=root_dir / "results" / "eval_checkpoints" / "CSRT",
+                        help="Per (config hash, sequence) box cache, shared with evaluate_dataset.py")
+    parser.add_argument("--out", type=Path, default=root_dir / "plots")
+    args = parser.parse_args()
+
+    sequences = find_sequences(args.dataset)
+    if args.sequences:
+        sequences = [s for s in sequences if s["name"] in set(args.sequences)]
+    sequences = sequences[:args.max_sequences]
+    if not sequences:
+        raise SystemExit(f"No sequences found under {args.dataset}")
+
+    space = load_space(args.space) if args.space else DEFAULT_SPACE
+    configs = expand_space(space, args.mode, args.samples, args.seed)
+    print(f"Sweeping {len(configs)} configurations over {len(sequences)} sequences")
+
+    tasks = []
+    keys = []
+    for config in configs:
+        kwargs = {"params": config}
+        key = f"update-{config_key('CSRT', kwargs)}"
+        keys.append(key)
+        for sequence in sequences:
+            path = checkpoint_path(args.cache_dir, key, sequence["name"])
+            tasks.append(("CSRT", kwargs, sequence, path, key))
+
+    cached = run_tasks(tasks, args.workers)
+    print(f"{cached}/{len(tasks)} (config, sequence) cells served from cache")
+
+    rows = []
+    for config, key in zip(configs, keys):
+        results = {s["name"]: load_checkpoint(checkpoint_path(args.cache_dir, key, s["name"]))
+                   for s in sequences}
+        rows.append({"config": key, **config, **pooled_metrics(sequences, results)})
+
+    df = pd.DataFrame(rows)
+    df["pareto_auc"] = pareto_mask(df["fps"], df["auc"])
+    df["pareto_precision20"] = pareto_mask(df["fps"], df["precision20"])
+    df = df.sort_values("fps", ascending=False)
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    csv_path = args.out / "csrt_sweep_pareto.csv"
+    df.to_csv(csv_path, index=False, float_format="%.4f")
+    _plot_front(df, args.out)
+    print(f"Wrote {csv_path} and {args.out / 'csrt_sweep_pareto.png'}")
+    print(df[df["pareto_auc"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
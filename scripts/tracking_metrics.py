@@ -0,0 +1,204 @@
+"""
+OTB-style tracking accuracy metrics
+Success (IoU), precision (center error) and normalized precision curves computed over
+all frames at once; many sequences concatenated into one (N, 4) array are scored in a
+single pass by passing their boundaries as an offsets array
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+# OTB toolkit thresholds: IoU 0:0.05:1 and center error 0:50 pixels
+SUCCESS_THRESHOLDS = np.linspace(0, 1, 21)
+PRECISION_THRESHOLDS = np.arange(0, 51)
+# LaSOT/TrackingNet normalized precision: center error in units of the GT size, 0:0.01:0.5
+NORM_PRECISION_THRESHOLDS = np.linspace(0, 0.5, 51)
+
+
+def valid_boxes(gt: np.ndarray) -> np.ndarray:
+    """
+    Frames whose ground truth can be scored
+    OTB/LaSOT mark absent or unlabeled targets with zero-size (often all-zero) or NaN boxes
+    Returns:
+        (N,) bool
+    """
+    gt = np.asarray(gt, dtype=np.float64)
+    return np.isfinite(gt).all(axis=1) & (gt[:, 2] > 0) & (gt[:, 3] > 0)
+
+
+def iou(pred: np.ndarray, gt: np.ndarray) -> np.ndarray:
+    """
+    Intersection over union of (N, 4) boxes in (x, y, w, h) format
+    Returns:
+        (N,) IoU per frame; 0 where either box is empty or not finite
+    """
+    pred = np.asarray(pred, dtype=np.float64)
+    gt = np.asarray(gt, dtype=np.float64)
+
+    x1 = np.maximum(pred[:, 0], gt[:, 0])
+    y1 = np.maximum(pred[:, 1], gt[:, 1])
+    x2 = np.minimum(pred[:, 0] + pred[:, 2], gt[:, 0] + gt[:, 2])
+    y2 = np.minimum(pred[:, 1] + pred[:, 3], gt[:, 1] + gt[:, 3])
+
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    union = pred[:, 2] * pred[:, 3] + gt[:, 2] * gt[:, 3] - inter
+    ok = (union > 0) & np.isfinite(inter)
+    return np.divide(inter, union, out=np.zeros_like(inter), where=ok)
+
+
+def center_error(pred: np.ndarray, gt: np.ndarray) -> np.ndarray:
+    """
+    Euclidean distance between box centers of (N, 4) boxes in (x, y, w, h) format
+    Returns:
+        (N,) center error in pixels; inf where a box is not finite
+    """
+    pred = np.asarray(pred, dtype=np.float64)
+    gt = np.asarray(gt, dtype=np.float64)
+    pred_c = pred[:, :2] + pred[:, 2:] / 2
+    gt_c = gt[:, :2] + gt[:, 2:] / 2
+    return np.nan_to_num(np.hypot(*(pred_c - gt_c).T), nan=np.inf)
+
+
+def normalized_center_error(pred: np.ndarray, gt: np.ndarray) -> np.ndarray:
+    """
+    Center error with x/y offsets divided by the ground-truth width/height
+    Returns:
+        (N,) scale-invariant center error; inf where the GT box is empty
+    """
+    pred = np.asarray(pred, dtype=np.float64)
+    gt = np.asarray(gt, dtype=np.float64)
+    size = gt[:, 2:]
+    offset = pred[:, :2] + pred[:, 2:] / 2 - (gt[:, :2] + size / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = np.hypot(offset[:, 0] / size[:, 0], offset[:, 1] / size[:, 1])
+    return np.nan_to_num(error, nan=np.inf, posinf=np.inf)
+
+
+def success_curve(ious: np.ndarray, thresholds: np.ndarray = SUCCESS_THRESHOLDS) -> np.ndarray:
+    """Fraction of frames with IoU strictly above each threshold"""
+    ious = np.sort(np.asarray(ious))
+    if len(ious) == 0:
+        return np.zeros(len(thresholds))
+    return 1.0 - np.searchsorted(ious, thresholds, side='right') / len(ious)
+
+
+def precision_curve(errors: np.ndarray, thresholds: np.ndarray = PRECISION_THRESHOLDS) -> np.ndarray:
+    """Fraction of frames with center error at or below each threshold"""
+    errors = np.sort(np.asarray(errors))
+    if len(errors) == 0:
+        return np.zeros(len(thresholds))
+    return np.searchsorted(errors, thresholds, side='right') / len(errors)
+
+
+def _grouped_counts(values: np.ndarray, groups: np.ndarray, n_groups: int,
+                    thresholds: np.ndarray, above: bool) -> np.ndarray:
+    """
+    Per group and threshold, the number of values above (IoU) or at/below (error) it
+    Each value is binned once against the sorted thresholds and the bins are
+    accumulated, so the cost is O(N log T) with an (S, T) result, not an (N, T) mask
+    """
+    n = len(thresholds)
+    # Bin k = number of thresholds below the value: value > thresholds[j] exactly for
+    # j < k, and value <= thresholds[j] exactly for j >= k
+    bins = np.searchsorted(thresholds, values, side='left')
+    hist = np.bincount(groups * (n + 1) + bins, minlength=n_groups * (n + 1)).reshape(n_groups, n + 1)
+    if above:
+        return np.cumsum(hist[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    return np.cumsum(hist, axis=1)[:, :n]
+
+
+def evaluate_sequences(pred: np.ndarray, gt: np.ndarray, offsets: Optional[np.ndarray] = None,
+                       invalid: str = 'exclude') -> Dict[str, np.ndarray]:
+    """
+    Score many concatenated sequences in one vectorized pass
+    Args:
+        pred, gt: (N, 4) boxes in (x, y, w, h), all sequences concatenated
+        offsets: (S + 1,) sequence boundaries, sequence i is rows offsets[i]:offsets[i+1]
+            (default: one sequence)
+        invalid: Frames with invalid ground truth (see valid_boxes) are left out of
+            every metric ('exclude', LaSOT/GOT-10k protocol) or scored as failures
+            ('fail', pysot OTB behaviour)
+    Returns:
+        Per frame: iou, center_error, norm_center_error, valid
+        Per sequence (S,): frames (scored), auc, success50, precision20, norm_precision20,
+        norm_precision_auc; curves (S, T): success, precision, norm_precision;
+        'overall': the same scalar metrics with all scored frames pooled
+    """
+    if invalid not in ('exclude', 'fail'):
+        raise ValueError(f"invalid must be 'exclude' or 'fail', got '{invalid}'")
+    pred = np.asarray(pred, dtype=np.float64).reshape(-1, 4)
+    gt = np.asarray(gt, dtype=np.float64).reshape(-1, 4)
+    if pred.shape != gt.shape:
+        raise ValueError(f'Box arrays differ in shape: {pred.shape} vs {gt.shape}')
+    if offsets is None:
+        offsets = np.array([0, len(gt)])
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets[0] != 0 or offsets[-1] != len(gt) or np.any(np.diff(offsets) < 0):
+        raise ValueError('offsets must rise from 0 to the number of frames')
+    n_seq = len(offsets) - 1
+    groups = np.repeat(np.arange(n_seq), np.diff(offsets))
+
+    valid = valid_boxes(gt)
+    ious = np.where(valid, iou(pred, gt), 0.0)
+    errors = np.where(valid, center_error(pred, gt), np.inf)
+    norm_errors = np.where(valid, normalized_center_error(pred, gt), np.inf)
+
+    # Excluded frames go to an extra group that is dropped after counting
+    scored = valid if invalid == 'exclude' else np.ones(len(gt), dtype=bool)
+    groups = np.where(scored, groups, n_seq)
+    frames = np.bincount(groups, minlength=n_seq + 1)[:n_seq]
+
+    counts = {
+        'success': _grouped_counts(ious, groups, n_seq + 1, SUCCESS_THRESHOLDS, above=True),
+        'precision': _grouped_counts(errors, groups, n_seq + 1, PRECISION_THRESHOLDS, above=False),
+        'norm_precision': _grouped_counts(norm_errors, groups, n_seq + 1,
+                                          NORM_PRECISION_THRESHOLDS, above=False)
+    }
+    # Success@0.5 and Precision@20 use the same comparisons as the curves
+    counts['success50'] = np.bincount(groups, weights=ious > 0.5, minlength=n_seq + 1)
+    counts['precision20'] = np.bincount(groups, weights=errors <= 20, minlength=n_seq + 1)
+    counts['norm_precision20'] = np.bincount(groups, weights=norm_errors <= 0.2, minlength=n_seq + 1)
+    counts = {k: v[:n_seq] for k, v in counts.items()}
+
+    def rates(count, total):
+        total = np.asarray(total, dtype=np.float64)
+        if count.ndim > total.ndim:
+            total = total[..., None]
+        return np.divide(count, total, out=np.zeros(count.shape), where=total > 0)
+
+    results = {
+        'iou': ious,
+        'center_error': errors,
+        'norm_center_error': norm_errors,
+        'valid': valid,
+        'frames': frames
+    }
+    for name in ('success', 'precision', 'norm_precision'):
+        results[name] = rates(counts[name], frames)
+    for name in ('success50', 'precision20', 'norm_precision20'):
+        results[name] = rates(counts[name], frames)
+    results['auc'] = results['success'].mean(axis=1)
+    results['norm_precision_auc'] = results['norm_precision'].mean(axis=1)
+
+    total = frames.sum()
+    success = rates(counts['success'].sum(axis=0), total)
+    norm_precision = rates(counts['norm_precision'].sum(axis=0), total)
+    results['overall'] = {
+        'frames': int(total),
+        'auc': float(success.mean()),
+        'success50': float(rates(counts['success50'].sum(), total)),
+        'precision20': float(rates(counts['precision20'].sum(), total)),
+        'norm_precision20': float(rates(counts['norm_precision20'].sum(), total)),
+        'norm_precision_auc': float(norm_precision.mean())
+    }
+    return results
+
+
+def summarize(pred: np.ndarray, gt: np.ndarray, invalid: str = 'exclude') -> dict:
+    """
+    Compute the auc_compare.csv accuracy metrics for one set of boxes
+    Returns:
+        Dictionary with auc, success50, precision20 and norm_precision20
+    """
+    overall = evaluate_sequences(pred, gt, invalid=invalid)['overall']
+    return {k: overall[k] for k in ('auc', 'success50', 'precision20', 'norm_precision20')}
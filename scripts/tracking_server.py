@@ -0,0 +1,246 @@
+"""
+Multi-stream tracking server
+Serves N concurrent video streams (files, camera indices or RTSP URLs) from a fixed
+pool of worker threads. Each stream is assigned to one worker, each stream's decoder
+keeps only its newest frame (stale frames are dropped, never queued), and the server
+reports aggregate throughput plus per-stream latency
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from frame_reader import PrefetchReader
+from streaming_stats import StreamingMetric
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'trackers'))
+from registry import tracker_factory
+
+
+class Stream:
+    """One camera stream: its reader, its tracker and its latency record"""
+
+    def __init__(self, stream_id: str, source, tracker, bbox=None, realtime: bool = True):
+        """
+        Args:
+            stream_id: Name used in reports
+            source: Video path, camera index or URL for cv2.VideoCapture
+            tracker: Wrapper with init(frame, bbox) / update(frame)
+            bbox: Initial (x, y, w, h); default is the center box used by the benchmark
+            realtime: Pace file sources at their FPS like a camera
+        """
+        self.stream_id = stream_id
+        self.source = source
+        self.tracker = tracker
+        self.bbox = bbox
+        # Depth-1 dropping queue: a slow tracker always gets the newest frame
+        self.reader = PrefetchReader(source, depth=1, drop=True, realtime=realtime)
+        self.initialized = False
+        self.finished = False
+        self.processed = 0
+        # Constant memory however long the server runs; the lock keeps live stats()
+        # calls from reading a sketch while the worker thread updates it
+        self.e2e_ms = StreamingMetric(quantiles=True)
+        self.update_ms = StreamingMetric(quantiles=True)
+        self._lock = threading.Lock()
+
+    def process(self, frame, captured):
+        """Init on the first frame, track on the rest"""
+        if not self.initialized:
+            if self.bbox is None:
+                h, w = frame.shape[:2]
+                self.bbox = (w // 4, h // 4, w // 2, h // 2)
+            self.tracker.init(frame, self.bbox)
+            self.initialized = True
+            return
+
+        start = time.perf_counter()
+        success, bbox = self.tracker.update(frame)
+        end = time.perf_counter()
+        if success:
+            self.bbox = bbox
+        with self._lock:
+            self.processed += 1
+            self.update_ms.update((end - start) * 1000)
+            # Capture-to-result, including time the frame waited in its slot
+            self.e2e_ms.update((end - captured) * 1000)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            e2e = self.e2e_ms.summary()
+            update = self.update_ms.summary()
+        return {
+            'stream': self.stream_id,
+            'source': str(self.source),
+            'processed': self.processed,
+            'decoded': self.reader.decoded,
+            'dropped': self.reader.dropped,
+            'avg_update_ms': update['mean'],
+            'p99_update_ms': update['p99'] if update['count'] else 0.0,
+            'avg_e2e_latency_ms': e2e['mean'],
+            'p95_e2e_latency_ms': e2e['p95'] if e2e['count'] else 0.0,
+            'p99_e2e_latency_ms': e2e['p99'] if e2e['count'] else 0.0
+        }
+
+
+class TrackingServer:
+    """Fixed pool of worker threads, each serving its assigned streams"""
+
+    def __init__(self, workers: int = 4, idle_sleep: float = 0.0005):
+        """
+        Args:
+            workers: Worker threads; stream i is served by worker i % workers
+            idle_sleep: Seconds a worker sleeps when none of its streams has a frame
+        """
+        self.workers = workers
+        self.idle_sleep = idle_sleep
+        self.streams: List[Stream] = []
+        self._stop = threading.Event()
+        self._threads = []
+        self.start_time = None
+
+    def add_stream(self, stream: Stream):
+        """Register a stream before start(); it is assigned to the next worker"""
+        self.streams.append(stream)
+
+    def _assigned(self, worker: int) -> List[Stream]:
+        return self.streams[worker::self.workers]
+
+    def _serve(self, worker: int):
+        streams = self._assigned(worker)
+        while not self._stop.is_set():
+            active = [s for s in streams if not s.finished]
+            if not active:
+                return
+            busy = False
+            for stream in active:
+                ret, frame, captured = stream.reader.read_timed(timeout=0)
+                if ret:
+                    stream.process(frame, captured)
+                    busy = True
+                elif stream.reader.ended:
+                    stream.finished = True
+            if not busy:
+                time.sleep(self.idle_sleep)
+
+    def start(self):
+        """Start every stream's decoder and the worker pool"""
+        for stream in self.streams:
+            if not stream.reader.isOpened():
+                print(f"Warning: cannot open stream {stream.stream_id}: {stream.source}")
+                stream.finished = True
+                continue
+            stream.reader.start()
+        self.start_time = time.perf_counter()
+        for worker in range(min(self.workers, len(self.streams))):
+            thread = threading.Thread(target=self._serve, args=(worker,),
+                                      name=f'tracking-worker-{worker}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def stop(self):
+        """Stop workers and release all streams"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        for stream in self.streams:
+            stream.reader.release()
+            if hasattr(stream.tracker, 'close'):
+                stream.tracker.close()
+
+    def stats(self) -> Dict:
+        """Aggregate throughput and per-stream latency"""
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        streams = [s.stats() for s in self.streams]
+        processed = sum(s['processed'] for s in streams)
+        decoded = sum(s['decoded'] for s in streams)
+        dropped = sum(s['dropped'] for s in streams)
+        return {
+            'elapsed_s': elapsed,
+            'streams': len(streams),
+            'workers': self.workers,
+            'processed': processed,
+            'decoded': decoded,
+            'dropped': dropped,
+            'throughput_fps': processed / elapsed if elapsed > 0 else 0.0,
+            'drop_rate': dropped / decoded if decoded else 0.0,
+            'per_stream': streams
+        }
+
+    def run(self, duration: Optional[float] = None, report_interval: float = 5.0) -> Dict:
+        """Serve until every stream ends, duration elapses or Ctrl-C; returns final stats"""
+        self.start()
+        deadline = time.perf_counter() + duration if duration else None
+        next_report = time.perf_counter() + report_interval
+        try:
+            while self.running():
+                if deadline and time.perf_counter() >= deadline:
+                    break
+                time.sleep(0.05)
+                if time.perf_counter() >= next_report:
+                    stats = self.stats()
+                    print(f"[{stats['elapsed_s']:.0f}s] {stats['throughput_fps']:.1f} FPS over "
+                          f"{stats['streams']} streams, dropped {stats['dropped']}/{stats['decoded']}")
+                    next_report += report_interval
+        except KeyboardInterrupt:
+            print("Stopping...")
+        self.stop()
+        return self.stats()
+
+
+def _source(value: str):
+    """Camera indices are passed to cv2.VideoCapture as ints"""
+    return int(value) if value.isdigit() else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve multiple tracking streams from a worker pool')
+    parser.add_argument('--streams', nargs='+', required=True,
+                        help='Video files, camera indices or RTSP URLs')
+    parser.add_argument('--copies', type=int, default=1,
+                        help='Open each source N times to emulate more cameras')
+    parser.add_argument('--tracker', type=str, default='CSRT', help='Tracker name, e.g. CSRT or DiMP-int8')
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads in the pool')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='Stop after this many seconds (default: until all streams end)')
+    parser.add_argument('--no-realtime', action='store_true',
+                        help='Decode files as fast as possible instead of at their FPS')
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--output', type=str, default='../results', help='Output directory for stats')
+    args = parser.parse_args()
+
+    server = TrackingServer(workers=args.workers)
+    factory = tracker_factory(args.tracker)
+    for source in args.streams:
+        for copy in range(args.copies):
+            stream_id = f"{Path(str(source)).stem}-{copy}" if args.copies > 1 else Path(str(source)).stem
+            server.add_stream(Stream(stream_id, _source(source), factory(),
+                                     realtime=not args.no_realtime))
+
+    print(f"Serving {len(server.streams)} streams with {args.tracker} on {args.workers} workers")
+    stats = server.run(args.duration, args.report_interval)
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(stats['per_stream'])
+    df.to_csv(output_dir / 'tracking_server_streams.csv', index=False)
+    with open(output_dir / 'tracking_server_summary.json', 'w') as f:
+        json.dump({k: v for k, v in stats.items() if k != 'per_stream'}, f, indent=2)
+
+    print(df.to_string(index=False))
+    print(f"\nAggregate: {stats['throughput_fps']:.1f} FPS, {stats['processed']} frames tracked, "
+          f"{stats['dropped']}/{stats['decoded']} stale frames dropped")
+    print(f"Results saved to: {output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,163 @@ CSRT Tracker Wrapper - OpenCV implementation
 Channel and Spatial Reliability Tracker
 """
 import cv2
+import json
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from stage_timer import StageTimer
+
+# Named speed/accuracy trade-offs over cv2.TrackerCSRT_Params
+CSRT_PRESETS = {
+    'fast': {
+        'use_hog': True,
+        'use_color_names': False,
+        'use_gray': True,
+        'use_rgb': False,
+        'use_segmentation': False,
+        'use_channel_weights': False,
+        'number_of_scales': 17,
+        'template_size': 100,
+        'admm_iterations': 2
+    },
+    'balanced': {
+        'use_hog': True,
+        'use_color_names': False,
+        'use_gray': True,
+        'use_rgb': False,
+        'use_segmentation': True,
+        'use_channel_weights': True,
+        'number_of_scales': 25,
+        'template_size': 120,
+        'admm_iterations': 3
+    },
+    # OpenCV defaults
+    'accurate': {
+        'use_hog': True,
+        'use_color_names': True,
+        'use_gray': True,
+        'use_rgb': False,
+        'use_segmentation': True,
+        'use_channel_weights': True,
+        'number_of_scales': 33,
+        'template_size': 200,
+        'admm_iterations': 4
+    }
+}
+
+def load_profile(path):
+    """
+    Load a CSRT profile from YAML or JSON
+    The file holds an optional 'preset' name and a 'params' mapping of
+    TrackerCSRT_Params overrides, e.g. {"preset": "fast", "params": {"padding": 2.5}}
+    """
+    path = Path(path)
+    with open(path) as f:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            import yaml
+            profile = yaml.safe_load(f) or {}
+        else:
+            profile = json.load(f)
+    return {'preset': profile.get('preset'), 'params': profile.get('params') or {}}
 
 class CSRTWrapper:
     """Wrapper for OpenCV CSRT tracker"""
-    
-    def __init__(self):
-        self.tracker = cv2.TrackerCSRT_create()
+
+    def __init__(self, update_model=True, roi_padding=None, roi_max_side=None,
+                 preset=None, params=None, profile=None, async_update=False,
+                 refresh_interval=10):
+        """
+        Args:
+            update_model: If False, freeze all learning rates so the filter,
+                channel weights, color histograms and scale model stay at
+                their first-frame state ("pure" CSRT)
+            roi_padding: If set, hand CSRT only a search window around the target
+                instead of the full frame. The window is the bbox grown by
+                roi_padding * sqrt(w * h) and should exceed CSRT's own padding (3)
+            roi_max_side: If set with roi_padding, downscale the window so its
+                longer side is at most this many pixels
+            preset: Name in CSRT_PRESETS ('fast', 'balanced', 'accurate')
+            params: Dict of TrackerCSRT_Params overrides applied after the preset
+            profile: Path to a YAML/JSON profile (see load_profile); its preset is
+                used when preset is not given and its params sit under params
+            async_update: Decouple localization from model learning. Every frame is
+                localized with frozen learning rates; every refresh_interval frames a
+                background thread trains a fresh model on the current frame and box,
+                and it is swapped in to localize the next frame when ready
+            refresh_interval: Frames between background model refreshes
+        """
+        overrides = {}
+        if profile:
+            loaded = load_profile(profile)
+            preset = preset or loaded['preset']
+            overrides.update(loaded['params'])
+        if preset and preset not in CSRT_PRESETS:
+            raise ValueError(f"Unknown CSRT preset '{preset}', expected one of {sorted(CSRT_PRESETS)}")
+        overrides.update(params or {})
+        if async_update and roi_padding:
+            raise ValueError("async_update does not support roi_padding")
+
+        self.preset = preset
+        self.params = self._build_params(overrides)
+        self.update_model = update_model
+        self.async_update = async_update
+        self.refresh_interval = refresh_interval
+        self.roi_padding = roi_padding
+        self.roi_max_side = roi_max_side
+        self.tracker = self._create_tracker()
         self.initialized = False
         self.bbox = None
-        
+
+        # ROI mode state: window origin in frame coordinates and frame->window scale
+        self.roi = None
+        self.roi_scale = 1.0
+        self.reanchors = 0
+
+        # Async mode state: refresh worker, in-flight job and the frame it trains on
+        self._pool = None
+        self._job = None
+        self._refresh_frame = None
+        self.frame_num = 0
+        self.refreshes = 0
+
+        # CSRT localizes and learns inside one OpenCV call; only the work around it splits
+        self.timer = StageTimer(('crop', 'localize_learn', 'reanchor', 'refresh_handoff'))
+
+    def _build_params(self, overrides):
+        """Resolve OpenCV defaults, then the preset, then explicit overrides"""
+        params = cv2.TrackerCSRT_Params()
+        values = dict(CSRT_PRESETS[self.preset]) if self.preset else {}
+        values.update(overrides)
+
+        for name, value in values.items():
+            if name.startswith('_') or not hasattr(params, name):
+                valid = [n for n in dir(params) if not n.startswith('_')]
+                raise ValueError(f"Unknown TrackerCSRT_Params field '{name}', expected one of {valid}")
+            # Coerce to the type OpenCV uses for the field (YAML/JSON give ints for floats)
+            setattr(params, name, type(getattr(params, name))(value))
+        return params
+
+    def get_params(self):
+        """Effective TrackerCSRT_Params as a plain dict, for benchmark outputs"""
+        values = {name: getattr(self.params, name)
+                  for name in dir(self.params) if not name.startswith('_')}
+        if not self.update_model or self.async_update:
+            values.update(filter_lr=0.0, weights_lr=0.0, histogram_lr=0.0, scale_lr=0.0)
+        values['preset'] = self.preset
+        if self.async_update:
+            values['async_refresh_interval'] = self.refresh_interval
+        return values
+
+    def _create_tracker(self):
+        params = self.params
+        if not self.update_model or self.async_update:
+            params = cv2.TrackerCSRT_Params()
+            for name, value in self.get_params().items():
+                if hasattr(params, name):
+                    setattr(params, name, value)
+        return cv2.TrackerCSRT_create(params)
+
     def init(self, frame, bbox):
         """
         Initialize CSRT tracker
@@ -21,10 +168,17 @@ class CSRTWrapper:
             bbox: tuple (x, y, w, h)
         """
         self.bbox = bbox
-        success = self.tracker.init(frame, bbox)
+        if self.async_update:
+            self._start_async()
+        if self.roi_padding:
+            success = self._anchor(frame, bbox)
+        else:
+            success = self.tracker.init(frame, bbox)
+        # OpenCV >= 4.5.1 returns None from init
+        success = True if success is None else bool(success)
         self.initialized = success
         return success
-    
+
     def update(self, frame):
         """
         Track object in new frame
@@ -35,11 +189,140 @@ class CSRTWrapper:
         """
         if not self.initialized:
             return False, self.bbox
-            
-        success, bbox = self.tracker.update(frame)
+
+        if self.roi_padding:
+            return self._update_roi(frame)
+        if self.async_update:
+            return self._update_async(frame)
+
+        with self.timer.span('localize_learn'):
+            success, bbox = self.tracker.update(frame)
         if success:
             self.bbox = bbox
         return success, self.bbox
-    
+
+    def _crop(self, frame):
+        """Cut the anchored window out of the frame and rescale it"""
+        x0, y0, x1, y1 = self.roi
+        crop = frame[y0:y1, x0:x1]
+        if self.roi_scale != 1.0:
+            size = (max(1, round((x1 - x0) * self.roi_scale)),
+                    max(1, round((y1 - y0) * self.roi_scale)))
+            crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+        return crop
+
+    def _anchor(self, frame, bbox):
+        """
+        Place a search window around bbox and (re)initialize CSRT inside it
+        CSRT keeps its state in the coordinates of the images it is given, so the
+        window stays fixed until the target approaches its border
+        """
+        x, y, w, h = bbox
+        frame_h, frame_w = frame.shape[:2]
+        pad = self.roi_padding * np.sqrt(w * h)
+        win_w = min(frame_w, int(np.ceil(w + pad)))
+        win_h = min(frame_h, int(np.ceil(h + pad)))
+
+        # Center on the target, shifting (not shrinking) the window at frame borders
+        x0 = int(np.clip(round(x + w / 2 - win_w / 2), 0, frame_w - win_w))
+        y0 = int(np.clip(round(y + h / 2 - win_h / 2), 0, frame_h - win_h))
+        self.roi = (x0, y0, x0 + win_w, y0 + win_h)
+
+        self.roi_scale = 1.0
+        if self.roi_max_side and max(win_w, win_h) > self.roi_max_side:
+            self.roi_scale = self.roi_max_side / max(win_w, win_h)
+
+        s = self.roi_scale
+        local = (int(round((x - x0) * s)), int(round((y - y0) * s)),
+                 max(1, int(round(w * s))), max(1, int(round(h * s))))
+        self.tracker = self._create_tracker()
+        return self.tracker.init(self._crop(frame), local)
+
+    def _update_roi(self, frame):
+        with self.timer.span('crop'):
+            crop = self._crop(frame)
+        with self.timer.span('localize_learn'):
+            success, local = self.tracker.update(crop)
+        if not success:
+            return False, self.bbox
+
+        # Map back to full-frame coordinates
+        s = self.roi_scale
+        x0, y0, x1, y1 = self.roi
+        lx, ly, lw, lh = local
+        self.bbox = (lx / s + x0, ly / s + y0, lw / s, lh / s)
+
+        # Re-anchor once the target center leaves the middle half of the window;
+        # beyond that CSRT's own search area would be clipped by the crop
+        frame_h, frame_w = frame.shape[:2]
+        cx = self.bbox[0] + self.bbox[2] / 2
+        cy = self.bbox[1] + self.bbox[3] / 2
+        if (self._off_center(cx, x0, x1, frame_w) or
+                self._off_center(cy, y0, y1, frame_h)):
+            bbox = tuple(int(round(v)) for v in self.bbox)
+            with self.timer.span('reanchor'):
+                self._anchor(frame, bbox)
+            self.reanchors += 1
+        return True, self.bbox
+
+    @staticmethod
+    def _off_center(c, lo, hi, limit):
+        """
+        True if c left the middle half of [lo, hi) towards a side the window can move to
+        A window already against the frame border would be placed at the same spot again,
+        so re-anchoring there would only throw away the learned model
+        """
+        quarter = (hi - lo) / 4
+        mid = (lo + hi) / 2
+        return (c > mid + quarter and hi < limit) or (c < mid - quarter and lo > 0)
+
+    def _start_async(self):
+        """Reset refresh state at init, dropping any job from a previous sequence"""
+        self.close()
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._job = None
+        self._refresh_frame = None
+        self.frame_num = 0
+        self.refreshes = 0
+
+    def _refresh(self, frame, bbox):
+        """Worker thread: train a fresh model on (frame, bbox)"""
+        tracker = self._create_tracker()
+        tracker.init(frame, tuple(int(round(v)) for v in bbox))
+        return tracker
+
+    def _update_async(self, frame):
+        """Localize on the current model; refresh it in the background"""
+        # Swap in a finished refresh before localizing this frame (attribute
+        # assignment is atomic, localization never sees a half-built model).
+        # The new model jumps straight to the current frame; replaying every
+        # missed frame would never catch up at equal per-frame cost
+        if self._job is not None and self._job.done():
+            self.tracker = self._job.result()
+            self._job = None
+            self.refreshes += 1
+
+        with self.timer.span('localize_learn'):
+            success, bbox = self.tracker.update(frame)
+        if success:
+            self.bbox = bbox
+        self.frame_num += 1
+
+        if self._job is None and success and self.frame_num % self.refresh_interval == 0:
+            with self.timer.span('refresh_handoff'):
+                # Frames may be reused buffers, the worker needs its own copy. No job is
+                # in flight here, so the previous refresh frame buffer is free to reuse
+                if self._refresh_frame is None or self._refresh_frame.shape != frame.shape:
+                    self._refresh_frame = np.empty_like(frame)
+                np.copyto(self._refresh_frame, frame)
+                self._job = self._pool.submit(self._refresh, self._refresh_frame, self.bbox)
+        return success, self.bbox
+
+    def close(self):
+        """Stop the async refresh thread"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
     def get_name(self):
         return "CSRT"
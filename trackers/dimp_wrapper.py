@@ -5,48 +5,301 @@ Paper: "Learning Discriminative Model Prediction for Tracking" (ICCV 2019)
 import cv2
 import numpy as np
 import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from stage_timer import StageTimer
+from torch_backbone import (
+    PrecisionModel,
+    crop_to_tensor,
+    load_weights,
+    resnet_backbone,
+)
+
+# pytracking DiMP-18 defaults: 288 search image at 5x the target scale, stride 16 features
+IMAGE_SIZE = 288
+SEARCH_AREA_SCALE = 5.0
+FEATURE_STRIDE = 16
+FILTER_SIZE = 4
+INIT_ITERATIONS = 10
+STEP_LENGTH = 1.0
+FILTER_REG = 1e-2
+LEARNING_RATE = 0.01
+INIT_SAMPLE_MIN_WEIGHT = 0.25
+
+class DiMPFeatures(nn.Module):
+    """ResNet-18 backbone through layer3 with the classification feature projection"""
+
+    def __init__(self, out_channels=256):
+        super().__init__()
+        self.backbone = resnet_backbone(stride=FEATURE_STRIDE)
+        self.cls_feature = nn.Sequential(nn.Conv2d(256, out_channels, 3, padding=1), nn.ReLU())
+
+    def forward(self, image):
+        return self.cls_feature(self.backbone(image))
+
+class SampleMemory:
+    """
+    Fixed-capacity training set of (features, label) pairs with sample weights
+    Buffers are allocated once; when full, the lowest-weight non-initial sample is
+    replaced. Weights decay by (1 - learning_rate) per insertion, as in pytracking.
+    """
+
+    def __init__(self, capacity, feat_shape, learning_rate=LEARNING_RATE,
+                 init_min_weight=INIT_SAMPLE_MIN_WEIGHT):
+        self.capacity = capacity
+        self.learning_rate = learning_rate
+        self.init_min_weight = init_min_weight
+        self.features = torch.zeros(capacity, *feat_shape)
+        self.labels = torch.zeros(capacity, 1, *feat_shape[1:])
+        self.weights = torch.zeros(capacity)
+        self.size = 0
+        self.num_init = 0
+
+    def add(self, feat, label, init=False):
+        """Store one sample, returns the slot it was written to"""
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            # Initial samples are never replaced
+            slot = self.num_init + int(torch.argmin(self.weights[self.num_init:]))
+
+        if self.size == 1:
+            self.weights[0] = 1.0
+        else:
+            self.weights[:self.size] *= 1 - self.learning_rate
+            self.weights[slot] = self.learning_rate
+        with torch.inference_mode():
+            self.features[slot].copy_(feat[0])
+            self.labels[slot].copy_(label[0])
+        if init:
+            self.num_init = self.size
+
+        weights = self.weights[:self.size]
+        weights /= weights.sum()
+        # Keep a floor on the total weight of the first-frame samples
+        init_weight = weights[:self.num_init].sum()
+        if 0 < init_weight < self.init_min_weight:
+            weights[self.num_init:] *= (1 - self.init_min_weight) / (1 - init_weight)
+            weights[:self.num_init] *= self.init_min_weight / init_weight
+        return slot
+
+    def view(self):
+        """Stored (features, labels, weights)"""
+        return (self.features[:self.size], self.labels[:self.size], self.weights[:self.size])
+
+def optimize_filter(weights, feat, labels, sample_weights, iterations):
+    """
+    Steepest-descent steps on the weighted least-squares classification loss
+    sum_i w_i |f * x_i - y_i|^2 / HW + reg |f|^2 over the samples in feat (N, C, H, W)
+    """
+    pad = FILTER_SIZE // 2
+    h, w = feat.shape[-2:]
+    sw = sample_weights.view(-1, 1, 1, 1)
+    with torch.inference_mode():
+        for _ in range(iterations):
+            scores = F.conv2d(feat, weights, padding=pad)[..., :h, :w]
+            residual = (scores - labels) * sw
+            # Correlating samples (as channels) with residuals sums the gradient over samples
+            grad = F.conv2d(feat.transpose(0, 1), residual.transpose(0, 1),
+                            padding=pad)[..., :FILTER_SIZE, :FILTER_SIZE].transpose(0, 1)
+            grad = grad / (h * w) + FILTER_REG * weights
+            # Exact line search along the gradient for a quadratic loss
+            grad_scores = F.conv2d(feat, grad, padding=pad)[..., :h, :w]
+            grad_sq = (grad * grad).sum()
+            alpha = grad_sq / ((grad_scores * grad_scores * sw).sum() / (h * w)
+                               + FILTER_REG * grad_sq + 1e-8)
+            weights = weights - STEP_LENGTH * alpha * grad
+    return weights
 
 class DIMPWrapper:
     """Wrapper for DiMP tracker"""
-    
-    def __init__(self, model_path=None, device='cuda'):
-        self.device = torch.device(device if torch.cuda.is_available() else 'cpu')
+
+    def __init__(self, model_path=None, device='cuda', precision='fp32', calibration_frames=8,
+                 memory_size=50, update_interval=10, update_iterations=2, async_update=False):
+        """
+        Args:
+            model_path: DiMP-18 feature extractor state dict; untrained weights if not given
+            device: Kept for compatibility; inference runs on CPU
+            precision: 'fp32', 'bf16' (CPU autocast) or 'int8' (static quantized backbone)
+            calibration_frames: Crops of the first frame observed before the int8 backbone
+                is converted in init()
+            memory_size: Capacity of the training sample memory (at least 2: the initial
+                sample is never replaced)
+            update_interval: Run the filter optimizer every N frames (0 disables updates)
+            update_iterations: Steepest-descent iterations per update
+            async_update: Optimize on a worker thread; frames keep using the current
+                filter until the new one is ready
+        """
+        if memory_size < 2:
+            raise ValueError(f"memory_size must be at least 2, got {memory_size}")
+        self.device = torch.device('cpu')
         self.initialized = False
         self.bbox = None
-        self.use_simulation = True
-        
+        self.use_simulation = False
+        self.model_path = model_path
+        self.precision = precision
+        self.memory_size = memory_size
+        self.update_interval = update_interval
+        self.update_iterations = update_iterations
+        self.async_update = async_update
+
+        if model_path and not Path(model_path).exists():
+            raise FileNotFoundError(f"No DiMP weights at {model_path}")
+        if not model_path:
+            # Untrained weights are seeded so benchmark runs are reproducible
+            torch.manual_seed(0)
+        self.net = DiMPFeatures().eval()
+        if model_path:
+            load_weights(self.net, model_path)
+
+        # Preallocated crop (HWC uint8) and network input (NCHW float32)
+        self._crop = np.zeros((IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.uint8)
+        self._input = torch.zeros(1, 3, IMAGE_SIZE, IMAGE_SIZE)
+        self.features = PrecisionModel(self.net, precision, calibration_frames,
+                                       example_inputs=(self._input,))
+
+        # Online update state: samples waiting to enter the memory, in-flight optimizer job
+        self.memory = None
+        self._pending = []
+        self._job = None
+        self._pool = None
+        self.frame_num = 0
+        self.model_updates = 0
+        self.timer = StageTimer(('calibrate', 'crop', 'features', 'classify', 'model_update',
+                                 'model_update/optimize'))
+
+    def _sample(self, frame):
+        """Crop the search area around the current estimate and extract features"""
+        w, h = self.size
+        self.crop_size = SEARCH_AREA_SCALE * np.sqrt(w * h)
+        with self.timer.span('crop'):
+            crop_to_tensor(frame, self.center, self.crop_size, self._crop, self._input)
+        with self.timer.span('features'):
+            return self.features(self._input)
+
+    def _label(self, feat_size, offset=(0.0, 0.0)):
+        """Gaussian label at the target, offset (dx, dy) cells from the crop center"""
+        sigma = 0.25 * np.sqrt(np.prod(self.size)) / self.crop_size * IMAGE_SIZE / FEATURE_STRIDE
+        coords = torch.arange(feat_size, dtype=torch.float32) - (feat_size - 1) / 2
+        gx = torch.exp(-0.5 * ((coords - offset[0]) / sigma) ** 2)
+        gy = torch.exp(-0.5 * ((coords - offset[1]) / sigma) ** 2)
+        return torch.outer(gy, gx).view(1, 1, feat_size, feat_size)
+
     def init(self, frame, bbox):
         """Initialize tracker"""
+        self.close()
         self.bbox = bbox
-        self.initialized = True
-        
-        # Simulate discriminative model training
         x, y, w, h = bbox
-        template = frame[int(y):int(y+h), int(x):int(x+w)]
-        
-        # Simulate feature extraction
-        self.features = np.random.randn(256, 18, 18)
+        self.center = np.array([x + w / 2, y + h / 2], dtype=np.float64)
+        self.size = np.array([w, h], dtype=np.float64)
+
+        with self.timer.span('calibrate'):
+            # int8: observe search crops of this frame and convert before tracking starts
+            self.features.calibrate(frame, self.center, SEARCH_AREA_SCALE * np.sqrt(w * h),
+                                    self._crop, self._input)
+        feat = self._sample(frame)
+        feat_size = feat.shape[-1]
+
+        # Initial filter: target-region features pooled to the filter size
+        scale = IMAGE_SIZE / self.crop_size / FEATURE_STRIDE
+        tw, th = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        c = feat_size // 2
+        region = feat[:, :, c - th // 2:c - th // 2 + th, c - tw // 2:c - tw // 2 + tw]
+        self.filter = F.adaptive_avg_pool2d(region, FILTER_SIZE)
+        self.filter = self.filter / (self.filter.norm() + 1e-8)
+
+        self.memory = SampleMemory(self.memory_size, feat.shape[1:])
+        self.memory.add(feat, self._label(feat_size), init=True)
+        self.filter = optimize_filter(self.filter, *self.memory.view(), INIT_ITERATIONS)
+
+        self._pending = []
+        self._job = None
+        if self.async_update:
+            self._pool = ThreadPoolExecutor(max_workers=1)
+        self.frame_num = 0
+        self.model_updates = 0
+        self.initialized = True
         return True
-    
+
+    def _update_model(self, feat, label):
+        """Queue the new sample and run (or schedule) the filter optimizer every N frames"""
+        self._pending.append((feat, label))
+        # Samples arriving while the worker is busy wait here; keep only the newest
+        del self._pending[:-self.memory_size]
+
+        if self._job is not None:
+            if not self._job.done():
+                # Still optimizing; the memory must not change under the worker
+                return
+            self.filter = self._job.result()
+            self._job = None
+            self.model_updates += 1
+
+        if self.frame_num % self.update_interval:
+            return
+        for sample in self._pending:
+            self.memory.add(*sample)
+        self._pending.clear()
+
+        if self._pool is not None:
+            self._job = self._pool.submit(optimize_filter, self.filter, *self.memory.view(),
+                                          self.update_iterations)
+        else:
+            with self.timer.span('model_update/optimize'):
+                self.filter = optimize_filter(self.filter, *self.memory.view(),
+                                              self.update_iterations)
+            self.model_updates += 1
+
     def update(self, frame):
         """Track object"""
         if not self.initialized:
             return False, self.bbox
-            
-        x, y, w, h = self.bbox
-        
-        # Simulate discriminative prediction
-        predictions = np.random.randn(1, 18, 18)
-        
-        # Simulate IoU prediction
-        iou_pred = np.random.randn(1, 18, 18)
-        
-        drift = np.random.randn(2) * 2.5
-        new_x = max(0, min(frame.shape[1] - w, x + drift[0]))
-        new_y = max(0, min(frame.shape[0] - h, y + drift[1]))
-        
-        self.bbox = (new_x, new_y, w, h)
+
+        feat = self._sample(frame)
+        with self.timer.span('classify'):
+            pad = FILTER_SIZE // 2
+            scores = F.conv2d(feat, self.filter, padding=pad)[0, 0, :feat.shape[-2], :feat.shape[-1]]
+            # Displacement of the score peak from the crop center, in feature cells
+            row, col = divmod(int(torch.argmax(scores)), scores.shape[-1])
+        c = (scores.shape[-1] - 1) / 2
+        offset = (col - c, row - c)
+        step = self.crop_size / IMAGE_SIZE * FEATURE_STRIDE
+        self.center += np.array(offset) * step
+
+        self.frame_num += 1
+        if self.update_interval:
+            # Training sample: this crop's features labelled at the new estimate
+            with self.timer.span('model_update'):
+                self._update_model(feat, self._label(feat.shape[-1], offset))
+
+        frame_h, frame_w = frame.shape[:2]
+        self.center = np.clip(self.center, 0, [frame_w, frame_h])
+        w, h = self.size
+        self.bbox = (float(self.center[0] - w / 2), float(self.center[1] - h / 2), float(w), float(h))
         return True, self.bbox
-    
+
+    def close(self):
+        """Wait for an in-flight model update and stop the worker thread"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def get_params(self):
+        """Inference configuration, recorded in benchmark outputs"""
+        return {
+            'backend': 'torch',
+            'precision': self.precision,
+            'model_path': str(self.model_path) if self.model_path else None,
+            'model_mb': self.features.size_mb,
+            'memory_size': self.memory_size,
+            'update_interval': self.update_interval,
+            'update_iterations': self.update_iterations,
+            'async_update': self.async_update
+        }
+
     def get_name(self):
         return "DiMP"
@@ -0,0 +1,160 @@
+"""
+Keyframe tracking scheduler
+Runs a wrapped tracker only on keyframes (every k-th frame, or adaptively when the
+predicted motion since the last keyframe grows too large) and emits boxes from a
+constant-velocity Kalman filter in between
+"""
+import numpy as np
+
+class ConstantVelocityKalman:
+    """Kalman filter over (cx, cy, w, h, vx, vy) with box measurements (cx, cy, w, h)"""
+
+    def __init__(self, box, process_noise=1e-2, measurement_noise=1e-1):
+        """
+        Args:
+            box: Initial (x, y, w, h)
+            process_noise: Process noise, relative to the target area
+            measurement_noise: Measurement noise, relative to the target area
+        """
+        x, y, w, h = box
+        self.state = np.array([x + w / 2, y + h / 2, w, h, 0.0, 0.0])
+        self.cov = np.diag([1.0, 1.0, 1.0, 1.0, 10.0, 10.0])
+        self.F = np.eye(6)
+        self.F[0, 4] = self.F[1, 5] = 1.0
+        self.H = np.eye(4, 6)
+        scale = max(w * h, 1.0)
+        self.Q = np.eye(6) * process_noise * scale
+        self.R = np.eye(4) * measurement_noise * scale
+
+    def predict(self):
+        """Advance one frame, returns the predicted (x, y, w, h)"""
+        self.state = self.F @ self.state
+        self.cov = self.F @ self.cov @ self.F.T + self.Q
+        return self.box()
+
+    def correct(self, box):
+        """Fuse a measured (x, y, w, h), returns the filtered box"""
+        x, y, w, h = box
+        residual = np.array([x + w / 2, y + h / 2, w, h]) - self.H @ self.state
+        S = self.H @ self.cov @ self.H.T + self.R
+        K = self.cov @ self.H.T @ np.linalg.inv(S)
+        self.state = self.state + K @ residual
+        self.cov = (np.eye(6) - K @ self.H) @ self.cov
+        return self.box()
+
+    def box(self):
+        cx, cy, w, h = self.state[:4]
+        w, h = max(w, 1.0), max(h, 1.0)
+        return (cx - w / 2, cy - h / 2, w, h)
+
+    @property
+    def speed(self):
+        """Predicted center displacement per frame in pixels"""
+        return float(np.hypot(self.state[4], self.state[5]))
+
+class KeyframeTracker:
+    """Run any tracker wrapper on keyframes only, predicting boxes in between"""
+
+    def __init__(self, tracker, skip=2, motion_threshold=None, max_skip=8,
+                 process_noise=1e-2, measurement_noise=1e-1):
+        """
+        Args:
+            tracker: Wrapper with init(frame, bbox) / update(frame)
+            skip: Fixed schedule, run the tracker on every skip-th frame (1 = every frame)
+            motion_threshold: Adaptive schedule instead of skip: run the tracker once the
+                predicted displacement since the last keyframe exceeds this fraction
+                of sqrt(w * h), or after max_skip frames
+            max_skip: Longest gap between keyframes in adaptive mode
+            process_noise, measurement_noise: Kalman noise, relative to target area
+        """
+        self.tracker = tracker
+        self.skip = max(1, int(skip))
+        self.motion_threshold = motion_threshold
+        self.max_skip = max_skip
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.kalman = None
+        self.bbox = None
+        self.initialized = False
+        self.since_key = 0
+        self.frames = 0
+        self.keyframes = 0
+
+    def init(self, frame, bbox):
+        """Initialize the wrapped tracker and the motion model"""
+        success = self.tracker.init(frame, bbox)
+        success = True if success is None else bool(success)
+        self.kalman = ConstantVelocityKalman(bbox, self.process_noise, self.measurement_noise)
+        self.bbox = bbox
+        self.initialized = success
+        self.since_key = 0
+        self.frames = 0
+        self.keyframes = 0
+        return success
+
+    def _is_keyframe(self):
+        if self.motion_threshold is None:
+            return self.since_key >= self.skip
+        # Track the first frames densely until the filter has a velocity estimate
+        if self.keyframes < 2 or self.since_key >= self.max_skip:
+            return True
+        _, _, w, h = self.bbox
+        return self.kalman.speed * self.since_key > self.motion_threshold * np.sqrt(w * h)
+
+    def update(self, frame):
+        """
+        Track object in new frame
+        Returns:
+            success (bool), bbox (x, y, w, h); predicted between keyframes
+        """
+        if not self.initialized:
+            return False, self.bbox
+
+        self.frames += 1
+        self.since_key += 1
+        predicted = self.kalman.predict()
+        if not self._is_keyframe():
+            self.bbox = predicted
+            return True, self.bbox
+
+        self.keyframes += 1
+        self.since_key = 0
+        success, bbox = self.tracker.update(frame)
+        if success:
+            self.kalman.correct(bbox)
+            # Report the tracker's own box on keyframes, the filter only bridges gaps
+            self.bbox = tuple(float(v) for v in bbox)
+        else:
+            self.bbox = predicted
+        return success, self.bbox
+
+    @property
+    def timer(self):
+        """Stage timer of the wrapped tracker; stages stay zero on predicted frames"""
+        return getattr(self.tracker, 'timer', None)
+
+    @property
+    def skip_rate(self):
+        """Fraction of frames served by the predictor"""
+        return 1.0 - self.keyframes / self.frames if self.frames else 0.0
+
+    def close(self):
+        if hasattr(self.tracker, 'close'):
+            self.tracker.close()
+
+    def get_params(self):
+        """Wrapped tracker configuration plus the schedule"""
+        params = dict(self.tracker.get_params()) if hasattr(self.tracker, 'get_params') else {}
+        params['keyframe'] = {
+            'skip': self.skip,
+            'motion_threshold': self.motion_threshold,
+            'max_skip': self.max_skip,
+            'process_noise': self.process_noise,
+            'measurement_noise': self.measurement_noise
+        }
+        return params
+
+    def get_name(self):
+        if self.motion_threshold is None:
+            return f"{self.tracker.get_name()}-skip{self.skip}"
+        return f"{self.tracker.get_name()}-adaptive{self.motion_threshold:g}"
@@ -0,0 +1,72 @@
+"""
+Multi-target CSRT tracker
+Owns one CSRT instance per target and dispatches updates across a thread pool;
+OpenCV releases the GIL inside TrackerCSRT.update, so targets run in parallel
+"""
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from csrt_wrapper import CSRTWrapper
+
+class MultiCSRTTracker:
+    """Batched CSRT tracking of N targets in a shared frame"""
+
+    def __init__(self, max_workers=None, **csrt_kwargs):
+        """
+        Args:
+            max_workers: Thread pool size (default: number of CPUs)
+            csrt_kwargs: Passed to every CSRTWrapper
+        """
+        self.max_workers = max_workers or os.cpu_count()
+        self.csrt_kwargs = csrt_kwargs
+        self.trackers = []
+        self.boxes = np.zeros((0, 4), dtype=np.float64)
+        self.success = np.zeros(0, dtype=bool)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def _prepare(self, frame):
+        """Shared per-frame preparation, done once for all targets"""
+        return np.ascontiguousarray(frame)
+
+    def init(self, frame, bboxes):
+        """
+        Initialize one CSRT instance per target
+        Args:
+            frame: numpy array (H, W, 3)
+            bboxes: sequence of (x, y, w, h)
+        Returns:
+            (N,) bool array of init success
+        """
+        frame = self._prepare(frame)
+        self.trackers = [CSRTWrapper(**self.csrt_kwargs) for _ in bboxes]
+        self.boxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+
+        inits = self._pool.map(
+            lambda args: args[0].init(frame, tuple(int(v) for v in args[1])),
+            zip(self.trackers, bboxes))
+        self.success = np.fromiter(inits, dtype=bool, count=len(self.trackers))
+        return self.success
+
+    def update(self, frame):
+        """
+        Track all targets in a new frame
+        Args:
+            frame: numpy array (H, W, 3)
+        Returns:
+            success (N,) bool array, boxes (N, 4) float array of (x, y, w, h)
+        """
+        frame = self._prepare(frame)
+        results = self._pool.map(lambda tracker: tracker.update(frame), self.trackers)
+        for i, (success, bbox) in enumerate(results):
+            self.success[i] = success
+            if bbox is not None:
+                self.boxes[i] = bbox
+        return self.success.copy(), self.boxes.copy()
+
+    def close(self):
+        """Shut down the worker threads"""
+        self._pool.shutdown(wait=True)
+
+    def get_name(self):
+        return "MultiCSRT"
@@ -0,0 +1,140 @@
+"""
+Tracker interface and registry
+Trackers are registered by name as 'module:Class' strings and imported only when
+first constructed, so a CSRT-only run never imports torch. Third-party trackers can
+register through the 'csrtcompare.trackers' entry-point group.
+"""
+import importlib
+from functools import partial
+from importlib.metadata import entry_points
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Tuple, runtime_checkable
+
+import numpy as np
+
+BBox = Tuple[float, float, float, float]
+
+ENTRY_POINT_GROUP = 'csrtcompare.trackers'
+
+# Deep wrappers accept precision='fp32'|'bf16'|'int8'; variants are named e.g. 'DiMP-int8'
+DEEP_TRACKERS = ['OSTrack', 'SiamRPN++', 'DiMP']
+PRECISIONS = ['fp32', 'bf16', 'int8']
+
+@runtime_checkable
+class Tracker(Protocol):
+    """
+    Interface every tracker wrapper implements
+    Optional hooks, used when present:
+        update_batch(frames) -> list of (success, bbox), for trackers that batch frames
+        reset() -> drop per-sequence state (worker threads, models) before the next init
+        close() -> stop background work; reset() falls back to it
+        get_params() -> dict of effective configuration, recorded in results
+    """
+
+    def init(self, frame: np.ndarray, bbox: BBox) -> Optional[bool]:
+        """Initialize on the first frame; None means success"""
+        ...
+
+    def update(self, frame: np.ndarray) -> Tuple[bool, BBox]:
+        """Track the target into a new frame"""
+        ...
+
+    def get_name(self) -> str:
+        ...
+
+# name -> ('module:Class', constructor defaults)
+_REGISTRY: Dict[str, Tuple[str, Dict]] = {}
+_CLASSES: Dict[str, type] = {}
+_entry_points_loaded = False
+
+def register(name: str, target: str, **defaults):
+    """
+    Register a tracker without importing it
+    Args:
+        name: Name used on the command line and in results
+        target: 'module:Class' of a Tracker implementation
+        defaults: Constructor arguments fixed for this name (e.g. a variant)
+    """
+    if ':' not in target:
+        raise ValueError(f"Tracker target must be 'module:Class', got '{target}'")
+    _REGISTRY[name] = (target, defaults)
+
+register('CSRT', 'csrt_wrapper:CSRTWrapper')
+# Cropped/downscaled input path, benchmarked only when requested
+register('CSRT-ROI', 'csrt_wrapper:CSRTWrapper', roi_padding=5.0)
+# Localization decoupled from model refresh, for p99 comparison with 'CSRT'
+register('CSRT-async', 'csrt_wrapper:CSRTWrapper', async_update=True)
+register('OSTrack', 'ostrack_wrapper:OSTrackWrapper')
+register('SiamRPN++', 'siamrpn_wrapper:SiamRPNWrapper')
+register('DiMP', 'dimp_wrapper:DIMPWrapper')
+
+def _load_entry_points():
+    """Register plugin trackers; entry points are only read here, loaded on first use"""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name not in _REGISTRY:
+            register(ep.name, ep.value)
+
+def available() -> List[str]:
+    """Registered tracker names (precision variants of deep trackers are not listed)"""
+    _load_entry_points()
+    return sorted(_REGISTRY)
+
+def _resolve(name: str) -> Tuple[str, Dict]:
+    _load_entry_points()
+    if name in _REGISTRY:
+        return _REGISTRY[name]
+    base, _, precision = name.rpartition('-')
+    if base in DEEP_TRACKERS and precision in PRECISIONS:
+        target, defaults = _REGISTRY[base]
+        return target, dict(defaults, precision=precision)
+    raise KeyError(f"Unknown tracker '{name}', expected one of {available()}")
+
+def tracker_class(name: str) -> type:
+    """Import and return the class behind a tracker name"""
+    target, _ = _resolve(name)
+    if target not in _CLASSES:
+        module_name, class_name = target.split(':')
+        _CLASSES[target] = getattr(importlib.import_module(module_name), class_name)
+    return _CLASSES[target]
+
+def tracker_factory(name: str) -> Callable[..., Tracker]:
+    """Constructor for a tracker name, with the name's defaults applied; imports its module"""
+    _, defaults = _resolve(name)
+    return partial(tracker_class(name), **defaults)
+
+def create(name: str, **kwargs) -> Tracker:
+    """Construct a tracker by name"""
+    return tracker_factory(name)(**kwargs)
+
+def parse_names(spec: str) -> List[str]:
+    """Split a comma-separated --trackers value, validating every name"""
+    names = [n.strip() for n in spec.split(',') if n.strip()]
+    for name in names:
+        _resolve(name)
+    return names
+
+def variant_names(names: Sequence[str], precisions: Sequence[str]) -> List[str]:
+    """Expand deep trackers into one entry per precision; fp32 keeps the plain name"""
+    expanded = []
+    for name in names:
+        if name in DEEP_TRACKERS:
+            expanded.extend(name if p == 'fp32' else f'{name}-{p}' for p in precisions)
+        else:
+            expanded.append(name)
+    return expanded
+
+def update_batch(tracker: Tracker, frames: Sequence[np.ndarray]) -> List[Tuple[bool, BBox]]:
+    """Track through several frames, using the tracker's batch hook when it has one"""
+    if hasattr(tracker, 'update_batch'):
+        return tracker.update_batch(frames)
+    return [tracker.update(frame) for frame in frames]
+
+def reset(tracker: Tracker):
+    """Drop per-sequence state before re-initializing the tracker"""
+    if hasattr(tracker, 'reset'):
+        tracker.reset()
+    elif hasattr(tracker, 'close'):
+        tracker.close()
@@ -5,45 +5,248 @@ Paper: "SiamRPN++: Evolution of Siamese Visual Tracking" (CVPR 2019)
 import cv2
 import numpy as np
 import torch
+import torch.nn as nn
+import torch.nn.functional as F
 from pathlib import Path
 
+from stage_timer import StageTimer
+from torch_backbone import (
+    PrecisionModel,
+    crop_to_tensor,
+    load_weights,
+    resnet_backbone,
+    xcorr_depthwise,
+)
+
+# pysot SiamRPN++ defaults
+EXEMPLAR_SIZE = 127
+INSTANCE_SIZE = 255
+CONTEXT_AMOUNT = 0.5
+ANCHOR_STRIDE = 8
+ANCHOR_RATIOS = (0.33, 0.5, 1, 2, 3)
+ANCHOR_SCALE = 8
+PENALTY_K = 0.04
+WINDOW_INFLUENCE = 0.44
+LR = 0.4
+
+class DepthwiseRPN(nn.Module):
+    """Depthwise-correlation RPN head: classification and box regression per anchor"""
+
+    def __init__(self, anchor_num=len(ANCHOR_RATIOS), in_channels=256, hidden=256):
+        super().__init__()
+        self.cls_kernel = nn.Sequential(nn.Conv2d(in_channels, hidden, 3, bias=False),
+                                        nn.BatchNorm2d(hidden), nn.ReLU())
+        self.cls_search = nn.Sequential(nn.Conv2d(in_channels, hidden, 3, bias=False),
+                                        nn.BatchNorm2d(hidden), nn.ReLU())
+        self.loc_kernel = nn.Sequential(nn.Conv2d(in_channels, hidden, 3, bias=False),
+                                        nn.BatchNorm2d(hidden), nn.ReLU())
+        self.loc_search = nn.Sequential(nn.Conv2d(in_channels, hidden, 3, bias=False),
+                                        nn.BatchNorm2d(hidden), nn.ReLU())
+        self.cls_head = nn.Sequential(nn.Conv2d(hidden, hidden, 1), nn.ReLU(),
+                                      nn.Conv2d(hidden, 2 * anchor_num, 1))
+        self.loc_head = nn.Sequential(nn.Conv2d(hidden, hidden, 1), nn.ReLU(),
+                                      nn.Conv2d(hidden, 4 * anchor_num, 1))
+
+    def template(self, z_f):
+        """Correlation kernels from exemplar features, computed once per sequence"""
+        return self.cls_kernel(z_f), self.loc_kernel(z_f)
+
+    def track(self, x_f, kernels):
+        """Search branch against cached kernels"""
+        cls_k, loc_k = kernels
+        cls = self.cls_head(xcorr_depthwise(self.cls_search(x_f), cls_k))
+        loc = self.loc_head(xcorr_depthwise(self.loc_search(x_f), loc_k))
+        return cls, loc
+
+    def forward(self, z_f, x_f):
+        return self.track(x_f, self.template(z_f))
+
+class SiamRPN(nn.Module):
+    """ResNet-18 backbone with 1x1 adjust neck and depthwise RPN head"""
+
+    def __init__(self):
+        super().__init__()
+        self.backbone = resnet_backbone()
+        self.neck = nn.Sequential(nn.Conv2d(256, 256, 1, bias=False), nn.BatchNorm2d(256))
+        self.rpn = DepthwiseRPN()
+
+def generate_anchors(score_size):
+    """(4, K, S, S) anchors as (cx, cy, w, h) relative to the search crop center"""
+    base = []
+    size = ANCHOR_STRIDE * ANCHOR_STRIDE
+    for ratio in ANCHOR_RATIOS:
+        w = int(np.sqrt(size / ratio))
+        h = int(w * ratio)
+        base.append((w * ANCHOR_SCALE, h * ANCHOR_SCALE))
+    base = np.array(base, dtype=np.float32)
+
+    origin = -(score_size // 2) * ANCHOR_STRIDE
+    offsets = origin + ANCHOR_STRIDE * np.arange(score_size, dtype=np.float32)
+    xx, yy = np.meshgrid(offsets, offsets)
+    anchors = np.empty((4, len(base), score_size, score_size), dtype=np.float32)
+    anchors[0] = xx
+    anchors[1] = yy
+    anchors[2] = base[:, 0, None, None]
+    anchors[3] = base[:, 1, None, None]
+    return anchors
+
 class SiamRPNWrapper:
     """Wrapper for SiamRPN++ tracker"""
-    
-    def __init__(self, model_path=None, device='cuda'):
-        self.device = torch.device(device if torch.cuda.is_available() else 'cpu')
+
+    def __init__(self, model_path=None, device='cuda', precision='fp32', calibration_frames=8):
+        """
+        Args:
+            model_path: SiamRPN++ (ResNet-18) state dict; untrained weights if not given
+            device: Kept for compatibility; inference runs on CPU
+            precision: 'fp32', 'bf16' (CPU autocast) or 'int8' (static quantized backbone)
+            calibration_frames: Crops of the first frame observed before the int8 backbone
+                is converted in init()
+        """
+        self.device = torch.device('cpu')
         self.initialized = False
         self.bbox = None
-        self.use_simulation = True
-        
+        self.use_simulation = False
+        self.model_path = model_path
+        self.precision = precision
+
+        if model_path and not Path(model_path).exists():
+            raise FileNotFoundError(f"No SiamRPN++ weights at {model_path}")
+        if not model_path:
+            # Untrained weights are seeded so benchmark runs are reproducible
+            torch.manual_seed(0)
+        self.net = SiamRPN().eval()
+        if model_path:
+            load_weights(self.net, model_path)
+
+        # Preallocated crops (HWC uint8) and network inputs (NCHW float32)
+        self._template_crop = np.zeros((EXEMPLAR_SIZE, EXEMPLAR_SIZE, 3), dtype=np.uint8)
+        self._search_crop = np.zeros((INSTANCE_SIZE, INSTANCE_SIZE, 3), dtype=np.uint8)
+        self._template_input = torch.zeros(1, 3, EXEMPLAR_SIZE, EXEMPLAR_SIZE)
+        self._search_input = torch.zeros(1, 3, INSTANCE_SIZE, INSTANCE_SIZE)
+
+        # Backbone + neck carry the cost and are quantized; the RPN head correlates
+        # with per-sequence kernels and stays in fp32
+        features = nn.Sequential(self.net.backbone, self.net.neck)
+        self.features = PrecisionModel(features, precision, calibration_frames,
+                                       example_inputs=(self._search_input,))
+
+        # Correlation kernels cached at init; anchors and window per score map size
+        self.kernels = None
+        self._grids = {}
+        self.timer = StageTimer(('template/calibrate', 'template/crop', 'template/features', 'template/kernels',
+                                 'search_crop', 'features', 'rpn', 'postprocess'))
+
+    def _extract(self, image):
+        """Backbone + neck features; template features keep the center 7x7"""
+        f = self.features(image)
+        if image.shape[-1] == EXEMPLAR_SIZE:
+            l = (f.shape[-1] - 7) // 2
+            f = f[:, :, l:l + 7, l:l + 7]
+        return f
+
+    def _grid(self, score_size):
+        """Flattened (4, N) anchors and (N,) cosine window, built once per score map size"""
+        if score_size not in self._grids:
+            hanning = np.hanning(score_size)
+            window = np.tile(np.outer(hanning, hanning).ravel(), len(ANCHOR_RATIOS))
+            self._grids[score_size] = (generate_anchors(score_size).reshape(4, -1), window)
+        return self._grids[score_size]
+
     def init(self, frame, bbox):
         """Initialize tracker"""
         self.bbox = bbox
-        self.initialized = True
         x, y, w, h = bbox
-        template = frame[int(y):int(y+h), int(x):int(x+w)]
-        self.template = cv2.resize(template, (127, 127))
+        self.center = np.array([x + w / 2, y + h / 2], dtype=np.float64)
+        self.size = np.array([w, h], dtype=np.float64)
+
+        context = CONTEXT_AMOUNT * (w + h)
+        s_z = np.sqrt((w + context) * (h + context))
+        with self.timer.span('template/calibrate'):
+            # int8: observe search crops of this frame and convert before tracking starts
+            self.features.calibrate(frame, self.center, round(s_z * INSTANCE_SIZE / EXEMPLAR_SIZE),
+                                    self._search_crop, self._search_input)
+        with self.timer.span('template/crop'):
+            crop_to_tensor(frame, self.center, round(s_z), self._template_crop, self._template_input)
+
+        # Exemplar branch runs once; update only runs the search branch
+        with torch.inference_mode():
+            with self.timer.span('template/features'):
+                z_f = self._extract(self._template_input)
+            with self.timer.span('template/kernels'):
+                self.kernels = self.net.rpn.template(z_f)
+        self.initialized = True
         return True
-    
+
     def update(self, frame):
         """Track object"""
         if not self.initialized:
             return False, self.bbox
-            
-        x, y, w, h = self.bbox
-        
-        # Simulate RPN proposals
-        proposals = np.random.randn(5, 1000, 4)  # Simulate 1000 proposals
-        
-        # Simple template matching simulation
-        cx, cy = x + w/2, y + h/2
-        drift = np.random.randn(2) * 3
-        
-        new_x = max(0, min(frame.shape[1] - w, x + drift[0]))
-        new_y = max(0, min(frame.shape[0] - h, y + drift[1]))
-        
-        self.bbox = (new_x, new_y, w, h)
+
+        w, h = self.size
+        context = CONTEXT_AMOUNT * (w + h)
+        s_z = np.sqrt((w + context) * (h + context))
+        scale_z = EXEMPLAR_SIZE / s_z
+        s_x = s_z * INSTANCE_SIZE / EXEMPLAR_SIZE
+        with self.timer.span('search_crop'):
+            crop_to_tensor(frame, self.center, round(s_x), self._search_crop, self._search_input)
+
+        with torch.inference_mode():
+            with self.timer.span('features'):
+                x_f = self._extract(self._search_input)
+            with self.timer.span('rpn'):
+                cls, loc = self.net.rpn.track(x_f, self.kernels)
+
+        with self.timer.span('postprocess'):
+            self._postprocess(frame, cls, loc, scale_z)
         return True, self.bbox
-    
+
+    def _postprocess(self, frame, cls, loc, scale_z):
+        """Pick the best anchor and update center/size with the smoothed scale"""
+        w, h = self.size
+        score_size = cls.shape[-1]
+        anchors, window = self._grid(score_size)
+        cls = cls.view(2, len(ANCHOR_RATIOS), score_size, score_size)
+        score = F.softmax(cls, dim=0)[1].numpy().ravel()
+        delta = loc.view(4, -1).numpy()
+        pred_cx = delta[0] * anchors[2] + anchors[0]
+        pred_cy = delta[1] * anchors[3] + anchors[1]
+        pred_w = np.exp(np.clip(delta[2], -10, 10)) * anchors[2]
+        pred_h = np.exp(np.clip(delta[3], -10, 10)) * anchors[3]
+
+        # Scale / aspect ratio change penalty and cosine window
+        def change(r):
+            return np.maximum(r, 1. / r)
+
+        def sz(w, h):
+            pad = (w + h) * 0.5
+            return np.sqrt((w + pad) * (h + pad))
+
+        s_c = change(sz(pred_w, pred_h) / sz(w * scale_z, h * scale_z))
+        r_c = change((w / h) / (pred_w / pred_h))
+        penalty = np.exp(-(r_c * s_c - 1) * PENALTY_K)
+        pscore = penalty * score
+        pscore = pscore * (1 - WINDOW_INFLUENCE) + window * WINDOW_INFLUENCE
+        best = int(np.argmax(pscore))
+
+        lr = penalty[best] * score[best] * LR
+        self.center += np.array([pred_cx[best], pred_cy[best]]) / scale_z
+        self.size = self.size * (1 - lr) + np.array([pred_w[best], pred_h[best]]) / scale_z * lr
+
+        frame_h, frame_w = frame.shape[:2]
+        self.center = np.clip(self.center, 0, [frame_w, frame_h])
+        self.size = np.clip(self.size, 10, [frame_w, frame_h])
+        new_w, new_h = self.size
+        self.bbox = (float(self.center[0] - new_w / 2), float(self.center[1] - new_h / 2),
+                     float(new_w), float(new_h))
+
+    def get_params(self):
+        """Inference configuration, recorded in benchmark outputs"""
+        return {
+            'backend': 'torch',
+            'precision': self.precision,
+            'model_path': str(self.model_path) if self.model_path else None,
+            'model_mb': self.features.size_mb
+        }
+
     def get_name(self):
         return "SiamRPN++"
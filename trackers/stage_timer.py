@@ -0,0 +1,72 @@
+"""
+Per-stage latency instrumentation
+Wrappers declare their stages once and time them with nested spans
+(`with self.timer.span('features'):`) based on time.perf_counter_ns. Elapsed time
+accumulates into a per-frame slot per stage. Toggling `enabled` rebinds `span` to a
+dict lookup handing out either the stage's span or a shared nullcontext. A disabled
+span is not free: the lookup plus an empty with-block cost about 0.3us against
+0.7us enabled, i.e. a few microseconds per frame for the wrappers' handful of spans.
+"""
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+class _Span:
+    """Reusable context manager adding its elapsed time to one stage slot"""
+    __slots__ = ('current', 'index', 'start')
+
+    def __init__(self, current, index):
+        self.current = current
+        self.index = index
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.current[self.index] += perf_counter_ns() - self.start
+        return False
+
+_NULL_SPAN = nullcontext()
+
+class StageTimer:
+    """Named stage timings for the frame being processed"""
+
+    def __init__(self, stages, enabled=False):
+        """
+        Args:
+            stages: Stage names, fixed up front so per-frame records have fixed columns.
+                Nested stages are named 'parent/child'; times are inclusive
+            enabled: Start timing immediately (benchmarks enable it explicitly)
+        """
+        self.stages = tuple(stages)
+        # Plain list: += on a list slot is cheaper than on a NumPy element
+        self.current = [0] * len(self.stages)
+        self._spans = {name: _Span(self.current, i) for i, name in enumerate(self.stages)}
+        self._null_spans = dict.fromkeys(self.stages, _NULL_SPAN)
+        self.enabled = enabled
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        # span(name) is a bound dict lookup: no Python frame and no enabled check per call
+        self._enabled = bool(value)
+        self.span = (self._spans if self._enabled else self._null_spans).__getitem__
+
+    # Replaced per instance by the enabled setter; kept for documentation
+    def span(self, name):
+        """Context manager timing `name` for the current frame"""
+        return self._spans[name]
+
+    def start_frame(self):
+        """Zero the per-frame slots; call before each init/update"""
+        current = self.current
+        for i in range(len(current)):
+            current[i] = 0
+
+    def frame_ns(self):
+        """Nanoseconds spent in each stage during the current frame"""
+        return self.current
@@ -0,0 +1,230 @@
+"""
+Torch backbones and precision variants shared by the deep tracker wrappers
+Provides CPU-runnable ResNet/ViT feature extractors, crop preprocessing into
+preallocated tensors, and fp32 / bf16 autocast / int8 quantized execution
+"""
+import io
+import warnings
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+PRECISIONS = ('fp32', 'bf16', 'int8')
+
+MEAN = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1) * 255
+STD = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1) * 255
+
+def resnet_backbone(stride=8):
+    """
+    ResNet-18 through layer3 (256 channels)
+    stride=8 dilates layer3 instead of downsampling, as SiamRPN++ does; stride=16 is
+    the plain network used by DiMP
+    """
+    import torchvision
+    net = torchvision.models.resnet18(weights=None)
+    if stride == 8:
+        # torchvision's BasicBlock rejects replace_stride_with_dilation, patch layer3 directly
+        net.layer3[0].conv1.stride = (1, 1)
+        net.layer3[0].downsample[0].stride = (1, 1)
+        for block in net.layer3:
+            for conv in (block.conv1, block.conv2):
+                conv.dilation = conv.padding = (2, 2)
+    elif stride != 16:
+        raise ValueError(f"Unsupported backbone stride {stride}, expected 8 or 16")
+    return nn.Sequential(net.conv1, net.bn1, net.relu, net.maxpool,
+                         net.layer1, net.layer2, net.layer3)
+
+class Block(nn.Module):
+    """Pre-norm transformer block (timm ViT layout: qkv/proj attention and a GELU MLP)"""
+
+    def __init__(self, dim, heads, mlp_ratio=4):
+        super().__init__()
+        self.heads = heads
+        self.norm1 = nn.LayerNorm(dim)
+        self.qkv = nn.Linear(dim, dim * 3)
+        self.proj = nn.Linear(dim, dim)
+        self.norm2 = nn.LayerNorm(dim)
+        self.mlp = nn.Sequential(nn.Linear(dim, dim * mlp_ratio), nn.GELU(),
+                                 nn.Linear(dim * mlp_ratio, dim))
+
+    def forward(self, x):
+        b, n, c = x.shape
+        qkv = self.qkv(self.norm1(x)).reshape(b, n, 3, self.heads, c // self.heads)
+        q, k, v = qkv.permute(2, 0, 3, 1, 4)
+        attn = F.scaled_dot_product_attention(q, k, v)
+        x = x + self.proj(attn.transpose(1, 2).reshape(b, n, c))
+        return x + self.mlp(self.norm2(x))
+
+class ViTBackbone(nn.Module):
+    """One-stream ViT: template and search patches attend jointly (OSTrack style)"""
+
+    def __init__(self, dim=768, depth=12, heads=12, patch=16, template_size=128, search_size=256):
+        super().__init__()
+        self.search_grid = search_size // patch
+        self.patch_embed = nn.Conv2d(3, dim, patch, patch)
+        self.pos_template = nn.Parameter(torch.zeros(1, (template_size // patch) ** 2, dim))
+        self.pos_search = nn.Parameter(torch.zeros(1, self.search_grid ** 2, dim))
+        nn.init.trunc_normal_(self.pos_template, std=0.02)
+        nn.init.trunc_normal_(self.pos_search, std=0.02)
+        self.blocks = nn.Sequential(*[Block(dim, heads) for _ in range(depth)])
+        self.norm = nn.LayerNorm(dim)
+
+    def forward(self, template, search):
+        z = self.patch_embed(template).flatten(2).transpose(1, 2) + self.pos_template
+        x = self.patch_embed(search).flatten(2).transpose(1, 2) + self.pos_search
+        tokens = self.norm(self.blocks(torch.cat([z, x], dim=1)))
+        # Return search tokens as a (B, C, H, W) feature map
+        x = tokens[:, z.shape[1]:]
+        return x.transpose(1, 2).reshape(x.shape[0], -1, self.search_grid, self.search_grid)
+
+class CenterHead(nn.Module):
+    """Score map plus normalized box size per location (OSTrack center head, reduced)"""
+
+    def __init__(self, in_channels, hidden=128):
+        super().__init__()
+        self.tower = nn.Sequential(nn.Conv2d(in_channels, hidden, 3, padding=1), nn.ReLU())
+        self.score = nn.Conv2d(hidden, 1, 1)
+        self.size = nn.Conv2d(hidden, 2, 1)
+
+    def forward(self, features):
+        h = self.tower(features)
+        return self.score(h), torch.sigmoid(self.size(h))
+
+def xcorr_depthwise(search, kernel):
+    """Depthwise cross-correlation of (B, C, H, W) search features with (B, C, h, w) kernels"""
+    b, c = kernel.shape[:2]
+    out = F.conv2d(search.reshape(1, b * c, *search.shape[2:]),
+                   kernel.reshape(b * c, 1, *kernel.shape[2:]), groups=b * c)
+    return out.reshape(b, c, *out.shape[2:])
+
+def crop_to_tensor(frame, center, crop_size, buffer, tensor):
+    """
+    Crop a square of side crop_size around center, resize it into the preallocated
+    uint8 buffer (S, S, 3) and normalize into the preallocated tensor (1, 3, S, S)
+    Out-of-frame pixels replicate the border. Returns the tensor.
+    """
+    out_size = buffer.shape[0]
+    scale = out_size / crop_size
+    cx, cy = center
+    matrix = np.array([[scale, 0, out_size / 2 - cx * scale],
+                       [0, scale, out_size / 2 - cy * scale]], dtype=np.float64)
+    cv2.warpAffine(frame, matrix, (out_size, out_size), dst=buffer,
+                   flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    # BGR -> RGB and HWC -> CHW by copying each channel plane straight into the reused
+    # tensor; strided copies, no per-frame allocation
+    pixels = torch.from_numpy(buffer)
+    for c in range(3):
+        tensor[0, c].copy_(pixels[:, :, 2 - c])
+    tensor[0].sub_(MEAN).div_(STD)
+    return tensor
+
+class PrecisionModel:
+    """
+    Runs a module in fp32, bf16 autocast or int8
+    int8 uses dynamic quantization of nn.Linear for transformer models and FX static
+    quantization for conv nets; static mode observes calibration_frames inputs and then
+    converts the model. Wrappers calibrate from the first frame in init() so the observer
+    passes and the conversion never land in a timed update()
+    """
+
+    def __init__(self, model, precision='fp32', calibration_frames=8, example_inputs=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        self.precision = precision
+        self.calibration_frames = calibration_frames
+        self.calibrated = 0
+        self.model = model.eval()
+        self.static = False
+        self._size_mb = None
+
+        if precision == 'int8':
+            has_linear = any(isinstance(m, nn.Linear) for m in model.modules())
+            with warnings.catch_warnings():
+                # torch.ao.quantization is deprecated in favour of torchao but still ships
+                warnings.simplefilter('ignore')
+                if has_linear:
+                    # Transformers: Linear layers dominate cost, quantize them dynamically
+                    self.model = torch.ao.quantization.quantize_dynamic(
+                        model, {nn.Linear}, dtype=torch.qint8)
+                else:
+                    if calibration_frames < 1:
+                        raise ValueError("static int8 needs calibration_frames >= 1, "
+                                         f"got {calibration_frames}")
+                    from torch.ao.quantization import get_default_qconfig_mapping
+                    from torch.ao.quantization.quantize_fx import prepare_fx
+                    self.model = prepare_fx(model, get_default_qconfig_mapping('x86'),
+                                            example_inputs)
+                    self.static = True
+
+    @property
+    def calibrating(self):
+        return self.static and self.calibrated < self.calibration_frames
+
+    @property
+    def size_mb(self):
+        """Serialized size of the current model, computed once per conversion"""
+        if self._size_mb is None:
+            self._size_mb = model_size_mb(self.model)
+        return self._size_mb
+
+    def _convert(self):
+        from torch.ao.quantization.quantize_fx import convert_fx
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.model = convert_fx(self.model)
+        self._size_mb = None
+        self.static = False
+
+    def calibrate(self, frame, center, crop_size, buffer, tensor):
+        """
+        Observe calibration_frames crops of the first frame and convert the model
+        Crops after the first are shifted by up to a quarter crop and rescaled by up to
+        10% around the target, as later search crops are. No-op unless calibrating.
+        Args:
+            frame, center, crop_size, buffer, tensor: As for crop_to_tensor
+        """
+        if not self.calibrating:
+            return
+        # Fixed seed: the converted model is the same on every run
+        rng = np.random.default_rng(0)
+        center = np.asarray(center, dtype=np.float64)
+        with torch.inference_mode():
+            for i in range(self.calibration_frames - self.calibrated):
+                shift = rng.uniform(-0.25, 0.25, 2) * crop_size if i else 0.0
+                scale = rng.uniform(0.9, 1.1) if i else 1.0
+                crop_to_tensor(frame, center + shift, crop_size * scale, buffer, tensor)
+                self.model(tensor)
+        self.calibrated = self.calibration_frames
+        self._convert()
+
+    def __call__(self, *inputs):
+        with torch.inference_mode():
+            if self.precision == 'bf16':
+                with torch.autocast('cpu', dtype=torch.bfloat16):
+                    out = self.model(*inputs)
+                return out.float() if torch.is_tensor(out) else tuple(o.float() for o in out)
+
+            out = self.model(*inputs)
+            if self.static:
+                self.calibrated += 1
+                if self.calibrated >= self.calibration_frames:
+                    self._convert()
+            return out
+
+def load_weights(module, path):
+    """Load a state dict saved for this architecture; report missing/unexpected keys"""
+    state = torch.load(path, map_location='cpu')
+    state = state.get('state_dict', state) if isinstance(state, dict) else state
+    result = module.load_state_dict(state, strict=False)
+    if result.missing_keys or result.unexpected_keys:
+        print(f"Warning: {path}: {len(result.missing_keys)} missing, "
+              f"{len(result.unexpected_keys)} unexpected keys")
+
+def model_size_mb(module):
+    """Serialized state dict size, counting packed quantized weights"""
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell() / 1024 / 1024